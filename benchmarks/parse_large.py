@@ -0,0 +1,54 @@
+"""Parse time of very large, generated fsm description files.
+
+    Compares Parser.parse with Parser.parse_stream on synthetic descriptions
+    of increasing size. Each state has a few events, actions and an ENTER,
+    so the number of distinct action names grows with the file.
+
+        PYTHONPATH=. python benchmarks/parse_large.py [STATES ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from fsm.parser import Parser
+
+
+def generate(states, events=4):
+    """Yield the lines of a description with the given number of states."""
+    for num in range(states):
+        yield 'STATE s{}\n'.format(num)
+        yield '  ENTER enter{}\n'.format(num)
+        for event in range(events):
+            yield '  EVENT e{} s{}\n'.format(event, (num + event + 1) % states)
+            yield '    ACTION a{}_{}\n'.format(num, event)
+    yield 'DEFAULT reset s0\n'
+
+
+def timed(parse, path):
+    start = time.perf_counter()
+    parser = parse(path)
+    return time.perf_counter() - start, parser
+
+
+def main(sizes):
+    Parser.cache = None
+    print('{:>8} {:>10} {:>10} {:>8}'.format(
+        'states', 'parse', 'stream', 'ratio'))
+    for size in sizes:
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.fsm', delete=False) as output:
+            output.writelines(generate(size))
+        try:
+            parse, one = timed(Parser.parse, output.name)
+            stream, two = timed(Parser.parse_stream, output.name)
+        finally:
+            os.unlink(output.name)
+        assert one.actions == two.actions
+        assert len(one.states) == len(two.states) == size + 1
+        print('{:>8} {:>9.3f}s {:>9.3f}s {:>7.1f}x'.format(
+            size, parse, stream, parse / stream))
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,223 @@
+"""Benchmark suite for dispatch, parsing, building and memory footprint.
+
+    Synthetic machines are generated at several sizes and timed with each
+    engine (FSM, Template, Table and compiled). Results are printed and,
+    with --output, written as json so that runs can be compared.
+
+        PYTHONPATH=. python benchmarks/suite.py [--output FILE]
+            [--sizes N ...] [--events N] [--instances N]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fsm
+from fsm.parser import Parser
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from parse_large import generate as large  # noqa: E402 pylint: disable=C0413
+
+
+def ring(size):
+    """Description of size states in a ring, each with one action."""
+    lines = []
+    for num in range(size):
+        lines.append('STATE s{}'.format(num))
+        lines.append('  EVENT next s{}'.format((num + 1) % size))
+        lines.append('    ACTION step')
+    lines.append('DEFAULT reset s0')
+    return lines
+
+
+def chain(size):
+    """Description where one event triggers size internal events."""
+    lines = ['STATE start', '  EVENT go chain', 'STATE chain', '  ENTER first']
+    for num in range(size):
+        lines.append('  EVENT e{}'.format(num))
+        lines.append('    ACTION a{}'.format(num))
+    lines.append('  EVENT done start')
+    return lines
+
+
+def chain_actions(size):
+    """Action routines for chain: each emits the next internal event."""
+    actions = {}
+    for num in range(size):
+        event = 'e{}'.format(num + 1) if num + 1 < size else 'done'
+        actions['a{}'.format(num)] = (lambda e: lambda: e)(event)
+    actions['first'] = lambda: 'e0'
+    return actions
+
+
+def default(size):
+    """Description of size states with only DEFAULT events."""
+    lines = ['STATE s{}'.format(num) for num in range(size)]
+    lines.extend(['DEFAULT ping', '  ACTION step'])
+    return lines
+
+
+def failing():
+    """Description whose only action raises, handled by an EXCEPTION."""
+    return [
+        'STATE one', '  EVENT fail', '    ACTION fail', '  EVENT error',
+    ]
+
+
+def step():
+    pass
+
+
+def fail():
+    raise ValueError('fail')
+
+
+def engines(parser, **actions):
+    """Return (name, factory) pairs that each create a new machine."""
+    template = parser.template(**actions)
+    table = parser.table(**actions)
+    machine = parser.specialize(**actions)
+    return [
+        ('fsm', lambda: parser.build(**actions)),
+        ('template', template.instance),
+        ('table', table.instance),
+        ('compiled', machine.instance),
+    ]
+
+
+def rate(function, count):
+    """Return calls per second of function(count)."""
+    gc.collect()
+    start = time.perf_counter()
+    function(count)
+    return count / (time.perf_counter() - start)
+
+
+class Suite(object):
+    """Collect benchmark results."""
+
+    def __init__(self, events, instances):
+        self.events = events
+        self.instances = instances
+        self.results = []
+
+    def record(self, name, engine, size, value, unit):
+        self.results.append(dict(
+            name=name, engine=engine, size=size, value=value, unit=unit))
+        print('{:<12} {:<10} {:>8} {:>14.6g} {}'.format(
+            name, engine, size, value, unit))
+
+    def dispatch(self, name, size, parser, event, **actions):
+        for engine, factory in engines(parser, **actions):
+            machine = factory()
+
+            def run(count, handle=machine.handle):
+                for _ in range(count):
+                    handle(event)
+
+            self.record(name, engine, size, rate(run, self.events),
+                        'events/s')
+
+    def throughput(self, size):
+        self.dispatch('single', size, Parser.parse(ring(size)), 'next',
+                      step=step)
+
+    def chains(self, size):
+        self.dispatch('chain', size, Parser.parse(chain(size)), 'go',
+                      **chain_actions(size))
+
+    def defaults(self, size):
+        self.dispatch('default', size, Parser.parse(default(size)), 'ping',
+                      step=step)
+
+    def exceptions(self):
+        parser = Parser.parse(failing())
+        parser.exception = lambda e: 'error'
+        self.dispatch('exception', 1, parser, 'fail', fail=fail)
+
+    def parse(self, size):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.fsm', delete=False) as output:
+            output.writelines(large(size))
+        try:
+            for engine, parse in (
+                    ('parse', Parser.parse),
+                    ('stream', Parser.parse_stream)):
+                start = time.perf_counter()
+                parse(output.name)
+                self.record('parse', engine, size,
+                            time.perf_counter() - start, 's')
+        finally:
+            os.unlink(output.name)
+
+    def build(self, size):
+        parser = Parser.parse(ring(size))
+        count = max(1, self.instances // size)
+        for engine, factory in engines(parser, step=step):
+            def run(count, factory=factory):
+                for _ in range(count):
+                    factory()
+            self.record('build', engine, size, rate(run, count),
+                        'instances/s')
+
+    def memory(self, size):
+        parser = Parser.parse(ring(size))
+        count = max(1, self.instances // size)
+        for engine, factory in engines(parser, step=step):
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            machines = [factory() for _ in range(count)]
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            self.record('memory', engine, size,
+                        (after - before) / len(machines), 'bytes/instance')
+            del machines
+
+    def run(self, sizes):
+        for size in sizes:
+            self.throughput(size)
+            self.chains(size)
+            self.defaults(size)
+            self.build(size)
+            self.memory(size)
+        self.exceptions()
+        for size in sizes:
+            self.parse(size * 10)
+
+    def as_dict(self):
+        return dict(
+            version=fsm.__version__,
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            time=time.time(),
+            events=self.events,
+            instances=self.instances,
+            results=self.results,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', help='write results as json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100,
+                                                                 1000])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--instances', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    Parser.cache = None
+    suite = Suite(args.events, args.instances)
+    suite.run(args.sizes)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(suite.as_dict(), output, indent=1)
+
+
+if __name__ == '__main__':
+    main()
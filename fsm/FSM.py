@@ -3,8 +3,39 @@
     MIT License
     https://github.com/robertchase/fsm/blob/master/LICENSE
 """
+from collections import namedtuple
+
+
 DEFAULT = '__default__'
 
+# --- undefined event policies for FSM.handle_many
+STOP = 'stop'  # stop at the first undefined event
+SKIP = 'skip'  # ignore undefined events
+COLLECT = 'collect'  # ignore undefined events, collecting their indexes
+
+# result of FSM.handle_many
+#   count -- number of events handled
+#   failed -- index of the first undefined event, or None
+#   undefined -- list of undefined event indexes (COLLECT policy only)
+BATCH = namedtuple('BATCH', 'count failed undefined')
+
+# --- shared empty payload: routines after the first get no arguments, and
+#     an exact empty tuple and dict are passed on without copying
+_NO_ARGS = ()
+_NO_KWARGS = {}
+
+
+def _on_state_change(new, old):
+    pass
+
+
+def _trace(state, event, is_default, is_internal):
+    pass
+
+
+def _undefined(state, event, is_default, is_internal):
+    pass
+
 
 class STATE(object):
     """FSM state
@@ -15,13 +46,22 @@ class STATE(object):
         Keyword Arguments:
         on_enter -- action to run when state is entered (callable)
         on_exit -- action to run when state is exited (callable)
+        timeout -- (seconds, event) to handle if the state is not exited
+                   in time (see fsm.timer)
+        defer -- frozenset of event names held by an fsm.eventqueue.EventQueue
+                 until a state that does not defer them is reached
     """
 
-    def __init__(self, name, on_enter=None, on_exit=None):
+    __slots__ = ('name', 'events', 'enter', 'exit', 'timeout', 'defer')
+
+    def __init__(self, name, on_enter=None, on_exit=None, timeout=None,
+                 defer=None):
         self.name = name
         self.events = {}
         self.enter = on_enter
         self.exit = on_exit
+        self.timeout = timeout
+        self.defer = defer
 
     def set_events(self, events):
         """Add a list of EVENT objects to the state."""
@@ -40,9 +80,11 @@ class EVENT(object):
         next_state -- state to transition to afer processing event
     """
 
+    __slots__ = ('name', 'actions', 'next_state')
+
     def __init__(self, name, actions, next_state=None):
         self.name = name
-        self.actions = actions
+        self.actions = tuple(actions)
         self.next_state = next_state
 
 
@@ -53,15 +95,23 @@ class FSM(object):
         states -- list of STATE objects
     """
 
+    __slots__ = (
+        'states', '_state', 'on_state_change', 'trace', 'undefined',
+        'exception', 'context', '_timers', '_timer', '__weakref__',
+    )
+
     def __init__(self, states):
         self.states = {}
         for state in states:
             self.states[state.name] = state
         self._state = None
-        self.on_state_change = lambda x, y: None
-        self.trace = lambda a, b, c, d: None
-        self.undefined = lambda a, b, c, d: None
+        self.on_state_change = _on_state_change
+        self.trace = _trace
+        self.undefined = _undefined
         self.exception = None
+        self.context = None
+        self._timers = None
+        self._timer = None
 
     @property
     def state(self):
@@ -71,28 +121,49 @@ class FSM(object):
     @state.setter
     def state(self, state):
         self._state = self.states[state]
+        if self._timers is not None:
+            self._arm()
 
-    def _handle(self, event):
+    @property
+    def timers(self):
+        """Return the fsm.timer.TimingWheel for TIMEOUTs, or None."""
+        return self._timers
+
+    @timers.setter
+    def timers(self, timers):
+        """Set the TimingWheel, arming the current state's TIMEOUT."""
+        self._timers = timers
+        if self._state is not None:
+            self._arm()
+
+    def _arm(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        timeout = self._state.timeout
+        if timeout and self._timers is not None:
+            seconds, event = timeout
+            self._timer = self._timers.arm(seconds, self.handle, event)
+
+    def _handle(self, event, args, kwargs):
         next_event = None
 
         for action in event.actions:
-            next_event = action(*self.args, **self.kwargs)
-            self.args = []
-            self.kwargs = {}
+            next_event = action(*args, **kwargs)
+            args, kwargs = _NO_ARGS, _NO_KWARGS
 
         if event.next_state:
             if self._state.exit:
-                next_event = self._state.exit(*self.args, **self.kwargs)
-                self.args = []
-                self.kwargs = {}
+                next_event = self._state.exit(*args, **kwargs)
+                args, kwargs = _NO_ARGS, _NO_KWARGS
 
             self.on_state_change(event.next_state.name, self._state.name)
             self._state = event.next_state
+            if self._timers is not None:
+                self._arm()
 
             if self._state.enter:
-                next_event = self._state.enter(*self.args, **self.kwargs)
-                self.args = []
-                self.kwargs = {}
+                next_event = self._state.enter(*args, **kwargs)
 
         return next_event
 
@@ -104,8 +175,17 @@ class FSM(object):
         args -- optional arguments for the first action routine
         kwargs -- optional keyword arguments for the first action routine
         """
-        self.args = args
-        self.kwargs = kwargs
+        return self._dispatch(event, args, kwargs)
+
+    def dispatch(self, event):
+        """Handle one event, with no arguments, in the current state.
+
+        The same as handle(event), without building the args and kwargs
+        that handle collects; use on hot paths.
+        """
+        return self._dispatch(event, _NO_ARGS, _NO_KWARGS)
+
+    def _dispatch(self, event, args, kwargs):
         is_internal = False
 
         while event:
@@ -125,22 +205,113 @@ class FSM(object):
             else:
                 state_event = None
 
-            # --- trace
-            self.trace(self._state.name, event, is_default, is_internal)
+            # --- trace (skipped entirely unless a tracer is set)
+            if self.trace is not _trace:
+                self.trace(self._state.name, event, is_default, is_internal)
 
             # --- no event handler
             if not state_event:
-                self.undefined(self._state.name, event, False, is_internal)
+                if self.undefined is not _undefined:
+                    self.undefined(
+                        self._state.name, event, False, is_internal)
                 return False  # event not handled!
 
             # --- handle, if non-null event is returned, keep going
             try:
-                event = self._handle(state_event)
+                event = self._handle(state_event, args, kwargs)
             except Exception as e:
                 if not self.exception:
                     raise
                 event = self.exception(e)
 
+            args, kwargs = _NO_ARGS, _NO_KWARGS
             is_internal = True  # every event after the first event is internal
 
         return True  # OK
+
+    def handle_many(self, events, undefined=STOP):
+        """Handle a batch of events, in order, in a single loop.
+
+        Arguments:
+        events -- iterable of event names
+
+        Keyword Arguments:
+        undefined -- policy for undefined events: STOP, SKIP or COLLECT
+
+        Returns:
+        BATCH
+        """
+        return self._batch(events, False, undefined)
+
+    def handle_payloads(self, events, undefined=STOP):
+        """Handle a batch of events with arguments for the first action.
+
+        Arguments:
+        events -- iterable of (event, args, kwargs) tuples
+
+        Keyword Arguments:
+        undefined -- policy for undefined events: STOP, SKIP or COLLECT
+
+        Returns:
+        BATCH
+        """
+        return self._batch(events, True, undefined)
+
+    def _batch(self, events, has_payload, policy):
+        if policy not in (STOP, SKIP, COLLECT):
+            raise ValueError('invalid undefined policy: {}'.format(policy))
+
+        # --- hoist everything that does not change between events
+        trace = None if self.trace is _trace else self.trace
+        on_undefined = None if self.undefined is _undefined \
+            else self.undefined
+        default = self.states[DEFAULT].events if DEFAULT in self.states \
+            else {}
+        collected = [] if policy == COLLECT else None
+        count = 0
+        failed = None
+
+        args, kwargs = _NO_ARGS, _NO_KWARGS
+        for index, event in enumerate(events):
+            if has_payload:
+                event, args, kwargs = event
+            is_internal = False
+
+            while event:
+                state_event = self._state.events.get(event)
+                is_default = False
+                if state_event is None:
+                    state_event = default.get(event)
+                    is_default = state_event is not None
+
+                if trace:
+                    trace(self._state.name, event, is_default, is_internal)
+
+                if state_event is None:
+                    if on_undefined:
+                        on_undefined(
+                            self._state.name, event, False, is_internal)
+                    break
+
+                try:
+                    event = self._handle(state_event, args, kwargs)
+                except Exception as e:
+                    if not self.exception:
+                        raise
+                    event = self.exception(e)
+
+                args, kwargs = _NO_ARGS, _NO_KWARGS
+                is_internal = True
+            else:
+                count += 1
+                continue
+
+            # --- event not handled
+            if failed is None:
+                failed = index
+            if policy == STOP:
+                break
+            if collected is not None:
+                collected.append(index)
+
+        return BATCH(count, failed, collected)
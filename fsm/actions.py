@@ -46,6 +46,105 @@ class DuplicateDirective(Exception):
         )
 
 
+class UndefinedParent(Exception):
+    """PARENT names a state that is not defined."""
+    def __init__(self, name, line):
+        super(UndefinedParent, self).__init__(
+            "undefined PARENT state '{}', line={}".format(name, line)
+        )
+
+
+class CircularParent(Exception):
+    """State is its own PARENT, directly or through other states."""
+    def __init__(self, name, line):
+        super(CircularParent, self).__init__(
+            "circular PARENT state '{}', line={}".format(name, line)
+        )
+
+
+class BadTimeout(Exception):
+    """TIMEOUT seconds is not a positive number."""
+    def __init__(self, value, line):
+        super(BadTimeout, self).__init__(
+            "TIMEOUT seconds must be a positive number, not '{}', "
+            "line={}".format(value, line)
+        )
+
+
+class Unsupported(Exception):
+    """Description uses a directive that an engine does not implement."""
+    def __init__(self, engine, directive, states):
+        super(Unsupported, self).__init__(
+            "{} does not support {}, state(s): {}".format(
+                engine, directive, ', '.join(states))
+        )
+
+
+class ImportFailed(ImportError):
+    """HANDLER, CONTEXT or EXCEPTION path could not be imported."""
+    def __init__(self, directive, path, line, error):
+        super(ImportFailed, self).__init__(
+            "{} import failed for '{}': {}, line={}".format(
+                directive, path, error, line)
+        )
+
+
+class Lazy(object):
+    """Callable imported on first use.
+
+        Arguments:
+        directive -- HANDLER, CONTEXT or EXCEPTION
+        path -- dot-delimited path to the callable
+        line -- line number of the directive, for error reporting
+    """
+
+    def __init__(self, directive, path, line):
+        self.directive = directive
+        self.path = path
+        self.line = line
+        self._value = None
+
+    def __getstate__(self):
+        return self.directive, self.path, self.line
+
+    def __setstate__(self, state):
+        self.directive, self.path, self.line = state
+        self._value = None
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def resolve(self):
+        """Import (once) and return the callable."""
+        if self._value is None:
+            try:
+                self._value = import_by_path(self.path)
+            except (ImportError, AttributeError, ValueError) as e:
+                raise ImportFailed(self.directive, self.path, self.line, e)
+        return self._value
+
+
+def supported(engine, states):
+    """Raise Unsupported if any of states has a TIMEOUT or DEFER.
+
+        Arguments:
+        engine -- name of the engine, for the message
+        states -- iterable of state objects (parsed or built)
+    """
+    states = list(states)
+    for directive, attr in (('TIMEOUT', 'timeout'), ('DEFER', 'defer')):
+        names = [state.name for state in states if getattr(state, attr)]
+        if names:
+            raise Unsupported(engine, directive, names)
+
+
+def resolve(value):
+    """Return value, or the imported callable if value is Lazy."""
+    if isinstance(value, Lazy):
+        return value.resolve()
+    return value
+
+
 class State(object):
     """FSM state help for context.
 
@@ -57,6 +156,10 @@ class State(object):
         self.name = name
         self.enter = None
         self.exit = None
+        self.parent = None
+        self.parent_line = None
+        self.timeout = None
+        self.defer = []
         self.events = {}
 
 
@@ -75,26 +178,56 @@ class Event(object):
 
 
 class Context(object):
-    """Context for fsm parser."""
+    """Context for fsm parser.
+
+        Keyword Arguments:
+        lazy -- if True, HANDLER, CONTEXT and EXCEPTION paths are not
+                imported until first use (see Lazy)
+    """
 
-    def __init__(self):
+    def __init__(self, lazy=False):
+        self.lazy = lazy
         self.states = {}
         self.first_state = None
         self.state = None
         self.event = None
-        self.actions = []
+        self._actions = set()
+        self._sorted_actions = []
         self.context = None
         self.handlers = {}
         self.exception = None
+        self.nested = False  # True if any PARENT directive is used
+        self.handler_paths = {}
+        self.context_path = None
+        self.exception_path = None
 
         self.line = None
         self.line_num = None
 
     def add_action(self, action):
         """Add an action"""
-        if action not in self.actions:
-            self.actions.append(action)
-            self.actions = sorted(self.actions)
+        if action not in self._actions:
+            self._actions.add(action)
+            self._sorted_actions = None
+
+    @property
+    def actions(self):
+        """Return a list of action names in sorted order."""
+        if self._sorted_actions is None:
+            self._sorted_actions = sorted(self._actions)
+        return self._sorted_actions
+
+    def load(self, directive, path):
+        """Return the callable at path, or a Lazy if lazy is set."""
+        value = Lazy(directive, path, self.line_num)
+        return value if self.lazy else value.resolve()
+
+    def resolve(self):
+        """Import any Lazy HANDLER, CONTEXT or EXCEPTION callables."""
+        for name, handler in self.handlers.items():
+            self.handlers[name] = resolve(handler)
+        self.context = resolve(self.context)
+        self.exception = resolve(self.exception)
 
     @property
     def events(self):
@@ -138,7 +271,8 @@ def act_exception(context):
         raise ExtraToken('EXCEPTION', line=context.line_num)
     if context.exception is not None:
         raise DuplicateDirective('EXCEPTION', context.line_num)
-    context.exception = import_by_path(context.line)
+    context.exception_path = context.line.strip()
+    context.exception = context.load('EXCEPTION', context.exception_path)
 
 
 def act_exit(context):
@@ -153,6 +287,48 @@ def act_exit(context):
     context.add_action(name)
 
 
+def act_parent(context):
+    """Action routine for PARENT directive."""
+    args = context.line.split()
+    if len(args) != 1:
+        raise ExtraToken('PARENT', line=context.line_num)
+    if context.state.parent is not None:
+        raise DuplicateDirective('PARENT', context.line_num)
+    context.state.parent = args[0].strip()
+    context.state.parent_line = context.line_num
+    context.nested = True
+
+
+def act_timeout(context):
+    """Action routine for TIMEOUT directive."""
+    args = context.line.split()
+    if len(args) == 1:
+        raise TooFewTokens('TIMEOUT', line=context.line_num)
+    if len(args) > 2:
+        raise ExtraToken('TIMEOUT', 'two', context.line_num)
+    if context.state.timeout is not None:
+        raise DuplicateDirective('TIMEOUT', context.line_num)
+    seconds, event = args
+    try:
+        value = float(seconds)
+    except ValueError:
+        value = 0
+    if not value > 0:
+        raise BadTimeout(seconds, context.line_num)
+    context.state.timeout = (value, event)
+
+
+def act_defer(context):
+    """Action routine for DEFER directive."""
+    args = context.line.split()
+    if len(args) != 1:
+        raise ExtraToken('DEFER', line=context.line_num)
+    name = args[0].strip()
+    if name in context.state.defer:
+        raise DuplicateName('DEFER', context.line_num)
+    context.state.defer.append(name)
+
+
 def act_event(context):
     """Action routine for EVENT directive."""
     args = context.line.split()
@@ -185,7 +361,8 @@ def act_context(context):
         raise ExtraToken('CONTEXT', line=context.line_num)
     if context.context:
         raise DuplicateName('CONTEXT', context.line_num)
-    context.context = import_by_path(context.line)
+    context.context_path = context.line.strip()
+    context.context = context.load('CONTEXT', context.context_path)
 
 
 def act_handler(context):
@@ -199,8 +376,8 @@ def act_handler(context):
     name = name.strip()
     if name in context.handlers:
         raise DuplicateName('HANDLER', context.line_num)
-    handler = import_by_path(path)
-    context.handlers[name] = handler
+    context.handlers[name] = context.load('HANDLER', path)
+    context.handler_paths[name] = path
 
 
 def act_default(context):
@@ -0,0 +1,138 @@
+"""Finite state machine for asyncio.
+
+    An AsyncFSM is an FSM whose handle method is a coroutine. Action, enter,
+    exit and EXCEPTION routines can be plain callables or coroutine
+    functions: a plain routine is called inline, and a routine which returns
+    an awaitable is awaited before the machine continues. Internal events
+    are handled within the same await.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from inspect import isawaitable
+
+from fsm.FSM import DEFAULT, FSM, STOP, SKIP, COLLECT, BATCH
+from fsm.FSM import _NO_ARGS, _NO_KWARGS, _trace, _undefined
+
+
+class AsyncFSM(FSM):
+    """Finite state machine with awaitable handle
+
+        Arguments:
+        states -- list of STATE objects
+
+        The on_state_change, trace and undefined hooks are plain callables.
+    """
+
+    __slots__ = ()
+
+    async def _handle(self, event, args, kwargs):
+        next_event = None
+
+        for action in event.actions:
+            next_event = action(*args, **kwargs)
+            args, kwargs = _NO_ARGS, _NO_KWARGS
+            if isawaitable(next_event):
+                next_event = await next_event
+
+        if event.next_state:
+            if self._state.exit:
+                next_event = self._state.exit(*args, **kwargs)
+                args, kwargs = _NO_ARGS, _NO_KWARGS
+                if isawaitable(next_event):
+                    next_event = await next_event
+
+            self.on_state_change(event.next_state.name, self._state.name)
+            self._state = event.next_state
+            if self._timers is not None:
+                self._arm()
+
+            if self._state.enter:
+                next_event = self._state.enter(*args, **kwargs)
+                if isawaitable(next_event):
+                    next_event = await next_event
+
+        return next_event
+
+    async def handle(self, event, *args, **kwargs):
+        """Handle one event in the current state.
+
+        Arguments:
+        event -- name of event to handle
+        args -- optional arguments for the first action routine
+        kwargs -- optional keyword arguments for the first action routine
+        """
+        return await self._dispatch(event, args, kwargs)
+
+    async def dispatch(self, event):
+        """Handle one event, with no arguments (see FSM.dispatch)."""
+        return await self._dispatch(event, _NO_ARGS, _NO_KWARGS)
+
+    async def _dispatch(self, event, args, kwargs):
+        is_internal = False
+        default = self.states[DEFAULT].events if DEFAULT in self.states \
+            else {}
+
+        while event:
+            is_default = False
+
+            # --- locate event handler, or default event handler
+            state_event = self._state.events.get(event)
+            if state_event is None:
+                state_event = default.get(event)
+                is_default = state_event is not None
+
+            # --- trace (skipped entirely unless a tracer is set)
+            if self.trace is not _trace:
+                self.trace(self._state.name, event, is_default, is_internal)
+
+            # --- no event handler
+            if not state_event:
+                if self.undefined is not _undefined:
+                    self.undefined(
+                        self._state.name, event, False, is_internal)
+                return False  # event not handled!
+
+            # --- handle, if non-null event is returned, keep going
+            try:
+                event = await self._handle(state_event, args, kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                if not self.exception:
+                    raise
+                event = self.exception(e)
+                if isawaitable(event):
+                    event = await event
+
+            args, kwargs = _NO_ARGS, _NO_KWARGS
+            is_internal = True  # every event after the first event is internal
+
+        return True  # OK
+
+    async def _batch(self, events, has_payload, policy):
+        if policy not in (STOP, SKIP, COLLECT):
+            raise ValueError('invalid undefined policy: {}'.format(policy))
+
+        collected = [] if policy == COLLECT else None
+        count = 0
+        failed = None
+
+        for index, event in enumerate(events):
+            if has_payload:
+                event, args, kwargs = event
+                handled = await self._dispatch(event, args, kwargs)
+            else:
+                handled = await self._dispatch(event, _NO_ARGS, _NO_KWARGS)
+
+            if handled:
+                count += 1
+                continue
+
+            # --- event not handled
+            if failed is None:
+                failed = index
+            if policy == STOP:
+                break
+            if collected is not None:
+                collected.append(index)
+
+        return BATCH(count, failed, collected)
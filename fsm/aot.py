@@ -0,0 +1,163 @@
+"""Ahead-of-time compiled machine modules.
+
+    An fsm description file is compiled (see fsm.compiler) into a standalone
+    python module which has no dependency on the fsm package. The module
+    resolves the description's HANDLER, CONTEXT and EXCEPTION paths the
+    first time a machine is created.
+
+    By convention the module for 'pkg.name.fsm' is 'pkg.name_fsm', written
+    next to the fsm file:
+
+        python -m fsm.aot pkg/name.fsm
+
+    Use load in place of Parser.load to prefer the prebuilt module; the
+    description is only parsed if the module is missing or out of date.
+
+    TIMEOUT and DEFER are not supported: building a module from a
+    description that uses them raises fsm.actions.Unsupported.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+import hashlib
+from importlib import import_module
+import os
+
+
+LOADER = '''
+from importlib import import_module
+
+SOURCE = {source!r}
+SOURCE_HASH = {source_hash!r}
+HANDLERS = {handlers!r}
+CONTEXT_PATH = {context!r}
+EXCEPTION_PATH = {exception!r}
+
+_machine = None
+
+
+def _import(path):
+    if path is None:
+        return None
+    module, name = path.rsplit('.', 1)
+    return getattr(import_module(module), name)
+
+
+def machine():
+    """Return the Machine class, importing HANDLERs on first call."""
+    global _machine
+    if _machine is None:
+        _machine = create(
+            {{name: _import(path) for name, path in HANDLERS.items()}},
+            _import(CONTEXT_PATH),
+            _import(EXCEPTION_PATH),
+        )
+    return _machine
+
+
+def load(*args, **kwargs):
+    """Return a new machine; args and kwargs are passed to the CONTEXT."""
+    cls = machine()
+    if CONTEXT_PATH is None:
+        return cls()
+    return cls(_import(CONTEXT_PATH)(*args, **kwargs))
+'''
+
+
+def digest(content):
+    """Return the hash of an fsm file's content (bytes)."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def module_name(path):
+    """Return the prebuilt module name for a dot-separated fsm path."""
+    if path.endswith('.fsm'):
+        path = path[:-4]
+    return path + '_fsm'
+
+
+def build(filename):
+    """Return the source of a standalone module for an fsm file.
+
+        Arguments:
+        filename -- filename, filepath or dot-separated path of an fsm file
+    """
+    from ergaleia.normalize_path import normalize_path
+    from fsm.compiler import generate
+    from fsm.parser import Parser
+
+    filename = normalize_path(filename, 'fsm')
+    with open(filename, 'rb') as source:
+        content = source.read()
+    parser = Parser._parse(content.decode().splitlines())
+    ctx = parser.ctx
+    return generate(parser) + LOADER.format(
+        source=os.path.basename(filename),
+        source_hash=digest(content),
+        handlers=ctx.handler_paths,
+        context=ctx.context_path,
+        exception=ctx.exception_path,
+    )
+
+
+def prebuilt(path):
+    """Return the prebuilt module for a dot-separated fsm path, or None.
+
+        A module is not used if the fsm file it was built from is found
+        next to it and has changed since.
+    """
+    if not isinstance(path, str) or os.path.sep in path:
+        return None
+    try:
+        module = import_module(module_name(path))
+    except ImportError:
+        return None
+    source = os.path.join(os.path.dirname(module.__file__), module.SOURCE)
+    if os.path.exists(source):
+        with open(source, 'rb') as data:
+            if digest(data.read()) != module.SOURCE_HASH:
+                return None  # stale
+    return module
+
+
+def load(path, *args, **kwargs):
+    """Create a compiled machine, preferring a prebuilt module.
+
+        Arguments:
+        path -- list, file, filename or filepath (see Parser.load)
+        *args -- passed to the context, if specified in description
+        **kwargs -- passed to the context, if specified in description
+    """
+    module = prebuilt(path)
+    if module:
+        return module.load(*args, **kwargs)
+
+    from fsm.actions import resolve
+    from fsm.parser import Parser
+    parser = Parser.parse(path)
+    machine = parser.specialize()
+    context = resolve(parser.ctx.context)
+    return machine(context(*args, **kwargs) if context else None)
+
+
+def main(argv):
+    """Write the compiled module for an fsm file."""
+    if len(argv) not in (1, 2):
+        raise SystemExit('usage: python -m fsm.aot FSM_FILE [OUTPUT]')
+    source = build(argv[0])
+    if len(argv) == 2:
+        output = argv[1]
+    else:
+        from ergaleia.normalize_path import normalize_path
+        filename = normalize_path(argv[0], 'fsm')
+        output = filename[:-4] if filename.endswith('.fsm') else filename
+        output += '_fsm.py'
+    with open(output, 'w') as out:
+        out.write(source)
+    print(output)
+
+
+if __name__ == '__main__':
+    import sys
+
+    main(sys.argv[1:])
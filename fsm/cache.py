@@ -0,0 +1,112 @@
+"""Cache of parsed fsm description files.
+
+    A parsed description (the parser's Context) is cached in memory and,
+    like __pycache__, on disk in a __fsmcache__ directory next to the fsm
+    file. Entries are keyed by a hash of the file's content, the library
+    version and the cache FORMAT, so an edited file, or a new version of
+    fsm, is always parsed again.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+import copy
+import hashlib
+import os
+import pickle
+
+import fsm
+
+
+DIRECTORY = '__fsmcache__'
+FORMAT = 3  # changed whenever the cached Context changes shape
+
+
+class Cache(object):
+    """Memory cache in front of an optional disk cache
+
+        Keyword Arguments:
+        disk -- if True, also cache on disk (default True)
+        directory -- name of the disk cache directory, created next to
+                     each fsm file
+    """
+
+    def __init__(self, disk=True, directory=DIRECTORY):
+        self.disk = disk
+        self.directory = directory
+        self._memory = {}
+
+    @staticmethod
+    def key(content):
+        """Return the cache key for the content of an fsm file."""
+        digest = hashlib.sha256(fsm.__version__.encode())
+        digest.update(str(FORMAT).encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def path(self, filename):
+        """Return the disk cache path for an fsm file."""
+        directory, name = os.path.split(os.path.abspath(filename))
+        return os.path.join(
+            directory, self.directory,
+            '{}.{}.pickle'.format(name, fsm.__version__))
+
+    def clear(self):
+        """Empty the memory cache."""
+        self._memory.clear()
+
+    def get(self, filename, content):
+        """Return a copy of the cached Context for an fsm file, or None.
+
+            Arguments:
+            filename -- path of the fsm file
+            content -- bytes read from the fsm file
+        """
+        key = self.key(content)
+        filename = os.path.abspath(filename)
+        cached = self._memory.get(filename)
+        if cached and cached[0] == key:
+            return self._copy(cached[1])
+
+        if not self.disk:
+            return None
+        try:
+            with open(self.path(filename), 'rb') as data:
+                cached_key, ctx = pickle.load(data)
+        except Exception:  # pylint: disable=broad-except
+            return None  # missing, unreadable or stale format
+        if cached_key != key:
+            return None
+        self._memory[filename] = (key, ctx)
+        return self._copy(ctx)
+
+    def put(self, filename, content, ctx):
+        """Cache the Context parsed from an fsm file.
+
+            Arguments:
+            filename -- path of the fsm file
+            content -- bytes read from the fsm file
+            ctx -- fsm.actions.Context
+        """
+        key = self.key(content)
+        filename = os.path.abspath(filename)
+        self._memory[filename] = (key, self._copy(ctx))
+
+        if not self.disk:
+            return
+        path = self.path(filename)
+        try:
+            data = pickle.dumps((key, ctx))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp = '{}.{}'.format(path, os.getpid())
+            with open(temp, 'wb') as output:
+                output.write(data)
+            os.replace(temp, path)
+        except Exception:  # pylint: disable=broad-except
+            pass  # unpicklable handler or unwritable directory: memory only
+
+    @staticmethod
+    def _copy(ctx):
+        """Copy the parts of a Context that bind/compile change."""
+        ctx = copy.copy(ctx)
+        ctx.handlers = ctx.handlers.copy()
+        return ctx
@@ -0,0 +1,239 @@
+"""Compile an fsm description into specialized python code.
+
+    Each state/event pair becomes a straight-line python function which
+    calls its action routines, the exit routine of the current state and
+    the enter routine of the next state in order, with DEFAULT events
+    already resolved. The generated source defines a create function that
+    returns a Machine class; it can be exec'd directly (see specialize) or
+    written to a module.
+
+    TIMEOUT and DEFER are not supported; generate raises
+    fsm.actions.Unsupported for a description that uses them (this covers
+    fsm.aot too).
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from fsm.actions import resolve, supported
+from fsm.FSM import DEFAULT
+
+
+HEADER = '''"""Generated by fsm.compiler -- do not edit."""
+# pylint: skip-file
+# flake8: noqa
+
+
+class State(object):
+    __slots__ = ('name', 'events')
+
+    def __init__(self, name):
+        self.name = name
+        self.events = {}
+
+
+def create(actions, context=None, exception=None):
+'''
+
+MACHINE = '''
+    class Machine(object):
+        __slots__ = ('_state', 'context', 'exception', 'on_state_change',
+                     'trace', 'undefined')
+
+        states = STATES
+
+        def __init__(self, context=None):
+            self._state = FIRST
+            self.context = context
+            self.exception = exception
+            self.on_state_change = None
+            self.trace = None
+            self.undefined = None
+
+        @classmethod
+        def instance(cls, context=None):
+            if context is None and CONTEXT:
+                context = CONTEXT()
+            return cls(context)
+
+        @property
+        def state(self):
+            return self._state.name
+
+        @state.setter
+        def state(self, state):
+            self._state = STATES[state]
+
+        def handle(self, event, *args, **kwargs):
+            ctx = self.context
+            is_internal = False
+            while event:
+                state = self._state
+                fn = state.events.get(event)
+                if self.trace is not None:
+                    self.trace(state.name, event, fn in DEFAULTS, is_internal)
+                if fn is None:
+                    if self.undefined is not None:
+                        self.undefined(state.name, event, False, is_internal)
+                    return False
+                try:
+                    event = fn(self, ctx, args, kwargs)
+                except Exception as e:
+                    if self.exception is None:
+                        raise
+                    event = {exception}
+                args, kwargs = NO_ARGS, NO_KWARGS
+                is_internal = True
+            return True
+
+    return Machine
+'''
+
+
+def _call(routine, bound, payload):
+    args = ['ctx'] if bound else []
+    if payload:
+        args.extend(('*args', '**kwargs'))
+    return '{}({})'.format(routine, ', '.join(args))
+
+
+def _transition(fn, state, event, states, variables, bound):
+    """Return the source lines of one specialized state/event function."""
+    routines = [variables['actions'][name] for name in event.actions]
+    if event.next_state:
+        if state.exit:
+            routines.append(variables['actions'][state.exit])
+        position = len(routines)
+        enter = states[event.next_state].enter
+        if enter:
+            routines.append(variables['actions'][enter])
+    else:
+        position = None
+
+    lines = ['    def {}(m, ctx, args, kwargs):'.format(fn)]
+    for index, routine in enumerate(routines):
+        if index == position:
+            lines.extend(_change(state, event, variables))
+        call = _call(routine, bound, index == 0)
+        if index == len(routines) - 1:
+            call = 'e = ' + call
+        lines.append('        ' + call)
+    if position == len(routines):
+        lines.extend(_change(state, event, variables))
+    lines.append('        return e' if routines else '        return None')
+    return lines
+
+
+def _change(state, event, variables):
+    return [
+        '        if m.on_state_change is not None:',
+        '            m.on_state_change({!r}, {!r})'.format(
+            event.next_state, state.name),
+        '        m._state = {}'.format(variables['states'][event.next_state]),
+    ]
+
+
+def generate(parser, bound=None):
+    """Return python source for a specialized machine.
+
+        Arguments:
+        parser -- parsed fsm.parser.Parser
+
+        Keyword Arguments:
+        bound -- if True, the machine's context is passed as the first
+                 argument to each routine; defaults to True if the
+                 description has a CONTEXT
+
+        Raises:
+        fsm.actions.Unsupported -- if a state has a TIMEOUT or DEFER
+    """
+    supported('fsm.compiler', parser.states.values())
+    if bound is None:
+        bound = parser.ctx.context is not None
+    states = {n: s for n, s in parser.states.items() if n != DEFAULT}
+    default = parser.states[DEFAULT].events if DEFAULT in parser.states \
+        else {}
+    variables = {
+        'actions': {n: 'a{}'.format(i) for i, n in enumerate(parser.actions)},
+        'states': {n: 's{}'.format(i) for i, n in enumerate(states)},
+    }
+
+    lines = HEADER.splitlines()
+    lines.append('    NO_ARGS = ()')
+    lines.append('    NO_KWARGS = {}')
+    lines.append('    CONTEXT = context')
+    for name in parser.actions:
+        lines.append('    {} = actions[{!r}]'.format(
+            variables['actions'][name], name))
+
+    table = []
+    for state in states.values():
+        events = dict((n, (e, True)) for n, e in default.items())
+        events.update((n, (e, False)) for n, e in state.events.items())
+        for num, (name, (event, is_default)) in enumerate(events.items()):
+            fn = '{}_e{}'.format(variables['states'][state.name], num)
+            lines.append('')
+            lines.append('    # {}: {}{}'.format(
+                state.name, name, ' (default)' if is_default else ''))
+            lines.extend(_transition(
+                fn, state, event, parser.states, variables, bound))
+            table.append((state.name, name, fn, is_default))
+
+    lines.append('')
+    lines.append('    STATES = {}')
+    for name, var in variables['states'].items():
+        lines.append('    {} = STATES[{!r}] = State({!r})'.format(
+            var, name, name))
+    for state, name, fn, _ in table:
+        lines.append('    {}.events[{!r}] = {}'.format(
+            variables['states'][state], name, fn))
+    lines.append('    DEFAULTS = frozenset(({}))'.format(
+        ''.join(fn + ', ' for _, _, fn, is_default in table if is_default)))
+    lines.append('    FIRST = {}'.format(
+        variables['states'].get(parser.first_state)))
+
+    lines.extend(MACHINE.format(
+        exception='self.exception(ctx, e)' if bound else 'self.exception(e)',
+    ).splitlines())
+    return '\n'.join(lines) + '\n'
+
+
+def load_source(source, actions, context=None, exception=None):
+    """Exec generated source and return its Machine class.
+
+        Arguments:
+        source -- python source returned by generate
+        actions -- dict of action routine callables by name
+
+        Keyword Arguments:
+        context -- CONTEXT callable, used by Machine.instance
+        exception -- EXCEPTION handler (callable)
+    """
+    namespace = {}
+    code = compile(source, '<fsm>', 'exec')
+    exec(code, namespace)  # pylint: disable=exec-used
+    return namespace['create'](actions, context, exception)
+
+
+def specialize(parser, **actions):
+    """Generate, exec and return a Machine class for a parsed description.
+
+        Arguments:
+        parser -- parsed fsm.parser.Parser
+
+        Keyword Arguments:
+        **actions -- action routine callables, overriding any HANDLER
+    """
+    handlers = parser.handlers.copy()
+    handlers.update(actions)
+    handlers = {name: resolve(h) for name, h in handlers.items()}
+    return load_source(
+        generate(parser), handlers,
+        resolve(parser.ctx.context), resolve(parser.ctx.exception))
+
+
+if __name__ == '__main__':
+    import sys
+    from fsm.parser import Parser
+
+    print(generate(
+        Parser.parse(sys.argv[1] if len(sys.argv) > 1 else sys.stdin)), end='')
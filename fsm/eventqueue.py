@@ -0,0 +1,188 @@
+"""Bounded, prioritized event queue with deferred events.
+
+    An EventQueue holds events for one machine and handles them, one at a
+    time, when run is called. Action routines can post any number of events
+    to the queue (for instance, through the machine's context); they are
+    handled after the current event completes.
+
+    A state can DEFER events that it is not ready for:
+
+        STATE connecting
+            DEFER send
+            EVENT connected open
+        STATE open
+            EVENT send
+                ACTION send
+
+    A deferred event is held, in order, until the machine changes to a
+    state that does not defer it; it is then handled ahead of the events
+    still queued. A change made outside the queue (a TIMEOUT, a direct call
+    to handle, or setting fsm.state) is noticed the next time run is called.
+
+    The queue is bounded by maxsize, counting deferred events. When it is
+    full, post either rejects the new event (REJECT) or drops the oldest
+    event of the lowest priority (DROP_OLDEST); either way the drop is
+    counted. high_water is the most events ever held at once.
+
+    An EventQueue is not thread-safe; see fsm.mailbox for that.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import deque
+
+
+# --- overflow policies
+REJECT = 'reject'  # do not queue the new event
+DROP_OLDEST = 'drop_oldest'  # drop the oldest event of the lowest priority
+
+
+class EventQueue(object):
+    """Bounded event queue in front of a machine
+
+        Arguments:
+        fsm -- fsm.FSM.FSM or fsm.template.Instance
+
+        Keyword Arguments:
+        maxsize -- most events held (queued and deferred), None for no limit
+        overflow -- REJECT or DROP_OLDEST, when maxsize is reached
+        priority -- dict of priority by event name; higher priority events
+                    are handled first, others have priority 0
+
+        Attributes:
+        high_water -- most events held at once
+        dropped -- number of events rejected or dropped
+        undefined -- number of events the machine did not handle
+    """
+
+    def __init__(self, fsm, maxsize=None, overflow=REJECT, priority=None):
+        if overflow not in (REJECT, DROP_OLDEST):
+            raise ValueError('invalid overflow policy: {}'.format(overflow))
+        self.fsm = fsm
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.priority = priority or {}
+        self._queues = {0: deque()}  # by priority
+        self._levels = [0]  # priorities, highest first
+        self._deferred = deque()
+        self._size = 0
+        self.high_water = 0
+        self.dropped = 0
+        self.undefined = 0
+
+    def __len__(self):
+        """Return the number of events held (queued and deferred)."""
+        return self._size
+
+    @property
+    def deferred(self):
+        """Return the number of deferred events."""
+        return len(self._deferred)
+
+    def _queue(self, level):
+        queue = self._queues.get(level)
+        if queue is None:
+            queue = self._queues[level] = deque()
+            self._levels = sorted(self._queues, reverse=True)
+        return queue
+
+    def post(self, event, *args, **kwargs):
+        """Queue an event for the machine.
+
+            Arguments:
+            event -- name of event to handle
+            args -- optional arguments for the first action routine
+            kwargs -- optional keyword arguments for the first action routine
+
+            Returns:
+            False if the event was rejected because the queue is full
+        """
+        level = self.priority.get(event, 0)
+        if self.maxsize is not None and self._size >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == REJECT or not self._drop(level):
+                return False
+        self._queue(level).append((event, args, kwargs))
+        self._size += 1
+        if self._size > self.high_water:
+            self.high_water = self._size
+        return True
+
+    def _drop(self, level):
+        """Drop the oldest queued event with priority <= level."""
+        for lowest in reversed(self._levels):
+            if lowest > level:
+                break
+            queue = self._queues[lowest]
+            if queue:
+                queue.popleft()
+                self._size -= 1
+                return True
+        return False
+
+    def _next(self):
+        for level in self._levels:
+            queue = self._queues[level]
+            if queue:
+                return queue.popleft()
+        return None
+
+    def _recall(self):
+        """Put deferred events back, ahead of the queued events."""
+        deferred = self._deferred
+        while deferred:
+            item = deferred.pop()
+            self._queue(self.priority.get(item[0], 0)).appendleft(item)
+
+    def _release(self):
+        """Put back the deferred events the current state does not defer.
+
+            Returns:
+            True if any were put back
+        """
+        deferred = self._deferred
+        if not deferred:
+            return False
+        defer = self.fsm._state.defer  # pylint: disable=protected-access
+        keep, released = [], []
+        for item in deferred:
+            if defer and item[0] in defer:
+                keep.append(item)
+            else:
+                released.append(item)
+        if not released:
+            return False
+        deferred.clear()
+        deferred.extend(keep)
+        for item in reversed(released):
+            self._queue(self.priority.get(item[0], 0)).appendleft(item)
+        return True
+
+    def run(self):
+        """Handle queued events until none are left, except deferred ones.
+
+            Returns:
+            number of events handled
+        """
+        fsm = self.fsm
+        deferred = self._deferred
+        count = 0
+        self._release()
+        while True:
+            item = self._next()
+            if item is None:
+                if self._release():
+                    continue
+                return count
+            event, args, kwargs = item
+            state = fsm._state  # pylint: disable=protected-access
+            if state.defer and event in state.defer:
+                deferred.append(item)
+                continue
+            self._size -= 1
+            if fsm.handle(event, *args, **kwargs):
+                count += 1
+            else:
+                self.undefined += 1
+            if deferred and fsm._state is not state:
+                self._recall()
@@ -0,0 +1,158 @@
+"""A fleet of keyed machines sharded across worker processes.
+
+    Each worker process parses the fsm description once and creates a
+    machine for each key routed to it. Events are routed by hashing the
+    key, so every event for a key is handled, in order, by the same
+    worker. Events are buffered in the parent and sent to workers in
+    batches.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+import multiprocessing
+
+from fsm.parser import Parser
+
+
+# results collected from the workers
+#   handled -- number of events handled
+#   undefined -- list of (key, event) not handled by the machine
+#   errors -- list of (key, event, repr(exception)) raised by the machine
+RESULTS = namedtuple('RESULTS', 'handled undefined errors')
+
+
+def _worker(conn, path, args, kwargs):
+    """Host machines for the keys routed to one worker process."""
+    parser = Parser.parse(path)
+    machines = {}
+    handled, undefined, errors = 0, [], []
+
+    while True:
+        command, data = conn.recv()
+        if command == 'events':
+            for key, event, event_args, event_kwargs in data:
+                fsm = machines.get(key)
+                if fsm is None:
+                    fsm = machines[key] = parser.compile(*args, **kwargs)
+                try:
+                    if fsm.handle(event, *event_args, **event_kwargs):
+                        handled += 1
+                    else:
+                        undefined.append((key, event))
+                except Exception as e:  # pylint: disable=broad-except
+                    errors.append((key, event, repr(e)))
+        elif command == 'collect':
+            conn.send(RESULTS(handled, undefined, errors))
+            handled, undefined, errors = 0, [], []
+        elif command == 'snapshot':
+            conn.send({key: fsm.state for key, fsm in machines.items()})
+        elif command == 'close':
+            conn.close()
+            return
+
+
+class Fleet(object):
+    """Keyed machines sharded across worker processes
+
+        Arguments:
+        path -- fsm description (see Parser.parse); must be picklable
+        *args -- passed to the context of each machine
+        **kwargs -- passed to the context of each machine
+
+        Keyword Arguments:
+        workers -- number of worker processes (default: cpu count)
+        batch -- number of events buffered for a worker before sending
+    """
+
+    def __init__(self, path, *args, workers=None, batch=1000, **kwargs):
+        self.batch = batch
+        self._conns = []
+        self._processes = []
+        self._buffers = []
+        for _ in range(workers or multiprocessing.cpu_count()):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(child, path, args, kwargs), daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+            self._buffers.append([])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def workers(self):
+        """Return the number of worker processes."""
+        return len(self._processes)
+
+    def worker(self, key):
+        """Return the index of the worker that hosts key."""
+        return hash(key) % len(self._conns)
+
+    def post(self, key, event, *args, **kwargs):
+        """Queue an event for the machine identified by key.
+
+            Arguments:
+            key -- hashable, picklable machine identifier
+            event -- name of event to handle
+            args -- optional arguments for the first action routine
+            kwargs -- optional keyword arguments for the first action routine
+        """
+        index = self.worker(key)
+        buffer = self._buffers[index]
+        buffer.append((key, event, args, kwargs))
+        if len(buffer) >= self.batch:
+            self._send(index)
+
+    def _send(self, index):
+        if self._buffers[index]:
+            self._conns[index].send(('events', self._buffers[index]))
+            self._buffers[index] = []
+
+    def flush(self):
+        """Send all buffered events to the workers."""
+        for index in range(len(self._conns)):
+            self._send(index)
+
+    def collect(self):
+        """Return (and reset) the RESULTS of all events sent so far."""
+        self.flush()
+        handled, undefined, errors = 0, [], []
+        for conn in self._conns:
+            conn.send(('collect', None))
+        for conn in self._conns:
+            result = conn.recv()
+            handled += result.handled
+            undefined.extend(result.undefined)
+            errors.extend(result.errors)
+        return RESULTS(handled, undefined, errors)
+
+    def snapshot(self):
+        """Return a dict of current state name by key."""
+        self.flush()
+        states = {}
+        for conn in self._conns:
+            conn.send(('snapshot', None))
+        for conn in self._conns:
+            states.update(conn.recv())
+        return states
+
+    def close(self):
+        """Flush buffered events and stop the worker processes."""
+        if not self._conns:
+            return
+        self.flush()
+        for conn in self._conns:
+            conn.send(('close', None))
+            conn.close()
+        for process in self._processes:
+            process.join()
+        self._conns = []
+        self._processes = []
+        self._buffers = []
@@ -4,12 +4,15 @@ from fsm.FSM import STATE, EVENT, FSM
 # action
 # context
 # default
+# defer
 # enter
 # event
 # exception
 # exit
 # handler
+# parent
 # state
+# timeout
 def create(**actions):
   S_init=STATE('init')
   S_state=STATE('state',on_enter=actions['state'])
@@ -21,7 +24,7 @@ def create(**actions):
   S_default=STATE('default',on_enter=actions['default'])
   S___default__=STATE('__default__')
   S_init.set_events([EVENT('state',[], S_state),])
-  S_state.set_events([EVENT('error',[], S_error),EVENT('enter',[actions['enter']]),EVENT('exit',[actions['exit']]),EVENT('event',[], S_event),EVENT('state',[], S_state),EVENT('context',[], S_context),EVENT('handler',[], S_handler),])
+  S_state.set_events([EVENT('error',[], S_error),EVENT('enter',[actions['enter']]),EVENT('exit',[actions['exit']]),EVENT('parent',[actions['parent']]),EVENT('timeout',[actions['timeout']]),EVENT('defer',[actions['defer']]),EVENT('event',[], S_event),EVENT('state',[], S_state),EVENT('context',[], S_context),EVENT('handler',[], S_handler),])
   S_event.set_events([EVENT('error',[], S_error),EVENT('action',[actions['action']]),EVENT('event',[], S_event),EVENT('state',[], S_state),EVENT('context',[], S_context),EVENT('handler',[], S_handler),])
   S_context.set_events([EVENT('handler',[], S_handler),])
   S_handler.set_events([EVENT('handler',[], S_handler),])
@@ -0,0 +1,107 @@
+"""Thread-safe, run-to-completion mailbox for a machine.
+
+    Events posted to a Mailbox are queued and handled one at a time, in the
+    order they were posted. Posting never blocks: if no other thread is
+    running the machine, the posting thread (or a worker from an executor)
+    drains the queue; otherwise the event is left for the thread that is
+    already running it. An event posted from inside an action routine is
+    handled after the current event completes.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import deque
+import threading
+
+
+class Mailbox(object):
+    """Run-to-completion event queue in front of a machine
+
+        Arguments:
+        fsm -- machine with a handle method (eg, fsm.FSM.FSM)
+
+        Keyword Arguments:
+        executor -- concurrent.futures.Executor to drain the queue; if None,
+                    the queue is drained by the posting thread
+        on_error -- called with an exception raised by the machine while
+                    an executor drains the queue
+
+        Attributes:
+        future -- Future of the last drain submitted to the executor, or
+                  None
+    """
+
+    def __init__(self, fsm, executor=None, on_error=None):
+        self.fsm = fsm
+        self.executor = executor
+        self.on_error = on_error
+        self.future = None
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Return the number of events waiting to be handled."""
+        return len(self._queue)
+
+    def post(self, event, *args, **kwargs):
+        """Queue an event for the machine.
+
+            Arguments:
+            event -- name of event to handle
+            args -- optional arguments for the first action routine
+            kwargs -- optional keyword arguments for the first action routine
+
+            If the queue is drained by the posting thread, an exception
+            raised by the machine propagates to that thread; events still
+            queued are handled on the next post.
+
+            If the queue is drained by an executor, an exception raised by
+            the machine is passed to on_error (the first is also left on
+            the drain's future) and the worker goes on to drain the events
+            still queued.
+        """
+        self._queue.append((event, args, kwargs))
+        if self._lock.locked():
+            return  # the thread running the machine will get to it
+        if self.executor:
+            self._submit()
+        else:
+            self.drain()
+
+    def _submit(self):
+        future = self.future = self.executor.submit(self.drain)
+        future.add_done_callback(self._drained)
+
+    def _drained(self, future):
+        """Report a drain's exception and drain what is left, in the same
+            worker thread.
+        """
+        error = None if future.cancelled() else future.exception()
+        while error is not None:
+            if self.on_error:
+                self.on_error(error)
+            try:
+                self.drain()
+                error = None
+            except Exception as e:  # pylint: disable=broad-except
+                error = e
+
+    def drain(self):
+        """Handle queued events until the queue is empty.
+
+            Returns immediately if another thread is running the machine.
+        """
+        queue = self._queue
+        handle = self.fsm.handle
+        while queue:
+            if not self._lock.acquire(False):
+                return
+            try:
+                while queue:
+                    event, args, kwargs = queue.popleft()
+                    handle(event, *args, **kwargs)
+            finally:
+                self._lock.release()
+            # --- loop: an event may have been posted after the last pop
+            #     but before the release
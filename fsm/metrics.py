@@ -0,0 +1,170 @@
+"""Opt-in transition counters and routine latency histograms.
+
+    A Metrics object can be attached to any number of FSMs; their counts
+    are accumulated together, and Metrics from different processes can be
+    combined with merge. Attaching wraps the fsm's trace and undefined
+    hooks and each action, enter and exit routine in its graph.
+
+        metrics = Metrics()
+        for fsm in machines:
+            metrics.attach(fsm)
+        ...
+        print(metrics.as_dict())
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from bisect import bisect_left
+from collections import Counter
+from functools import partial
+import time
+
+
+# upper bounds (nanoseconds) of the latency buckets; one more bucket
+# counts everything slower than the last bound
+BUCKETS = (
+    1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000,
+)
+
+
+class Histogram(object):
+    """Fixed-bucket latency histogram (see BUCKETS)."""
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0  # nanoseconds
+
+    def add(self, elapsed):
+        """Count one elapsed time, in nanoseconds."""
+        self.counts[bisect_left(BUCKETS, elapsed)] += 1
+        self.total += elapsed
+
+    def merge(self, other):
+        """Add the counts of another Histogram to this one."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+
+    @property
+    def count(self):
+        """Return the number of times counted."""
+        return sum(self.counts)
+
+
+def _name(routine):
+    while isinstance(routine, partial):
+        routine = routine.func
+    return getattr(routine, '__name__', repr(routine))
+
+
+class Metrics(object):
+    """Counters and histograms for one or more FSMs
+
+        Attributes:
+        events -- Counter of (state, event) for every event looked up
+        defaults -- Counter of (state, event) handled by a DEFAULT event
+        undefined -- Counter of (state, event) with no handler
+        chains -- Counter of internal events per call to handle
+        latency -- dict of Histogram by 'action:name', 'enter:name' or
+                   'exit:name'
+    """
+
+    def __init__(self):
+        self.events = Counter()
+        self.defaults = Counter()
+        self.undefined = Counter()
+        self.chains = Counter()
+        self.latency = {}
+
+    def _histogram(self, key):
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        return histogram
+
+    def timed(self, kind, routine):
+        """Return routine wrapped to record its latency."""
+        if getattr(routine, 'metrics', None) is self:
+            return routine  # already timed (eg, a shared graph)
+        histogram = self._histogram('{}:{}'.format(kind, _name(routine)))
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return routine(*args, **kwargs)
+            finally:
+                histogram.add(clock() - start)
+
+        timed.metrics = self
+        timed.__name__ = _name(routine)
+        return timed
+
+    def attach(self, fsm):
+        """Start collecting metrics for an fsm.FSM.FSM."""
+        events, defaults = self.events, self.defaults
+        undefined, chains = self.undefined, self.chains
+        trace, on_undefined = fsm.trace, fsm.undefined
+        chain = [0]
+
+        def traced(state, event, is_default, is_internal):
+            events[(state, event)] += 1
+            if is_default:
+                defaults[(state, event)] += 1
+            # --- count each call to handle under its internal event count
+            if is_internal:
+                length = chain[0]
+                if chains[length] == 1:
+                    del chains[length]
+                else:
+                    chains[length] -= 1
+                chain[0] = length = length + 1
+                chains[length] += 1
+            else:
+                chain[0] = 0
+                chains[0] += 1
+            trace(state, event, is_default, is_internal)
+
+        def missed(state, event, is_default, is_internal):
+            undefined[(state, event)] += 1
+            on_undefined(state, event, is_default, is_internal)
+
+        fsm.trace = traced
+        fsm.undefined = missed
+
+        for state in fsm.states.values():
+            if state.enter:
+                state.enter = self.timed('enter', state.enter)
+            if state.exit:
+                state.exit = self.timed('exit', state.exit)
+            for event in state.events.values():
+                event.actions = tuple(
+                    self.timed('action', action) for action in event.actions
+                )
+
+    def merge(self, other):
+        """Add the counts of another Metrics to this one."""
+        self.events.update(other.events)
+        self.defaults.update(other.defaults)
+        self.undefined.update(other.undefined)
+        self.chains.update(other.chains)
+        for key, histogram in other.latency.items():
+            self._histogram(key).merge(histogram)
+
+    def as_dict(self):
+        """Return the metrics as plain data (eg, for json)."""
+        def pairs(counter):
+            return [[s, e, count] for (s, e), count in counter.items()]
+        return {
+            'events': pairs(self.events),
+            'defaults': pairs(self.defaults),
+            'undefined': pairs(self.undefined),
+            'chains': {str(n): count for n, count in self.chains.items()},
+            'buckets': list(BUCKETS),
+            'latency': {
+                key: {'counts': h.counts, 'total': h.total}
+                for key, h in self.latency.items()
+            },
+        }
@@ -0,0 +1,141 @@
+"""Remove unreachable states and merge equivalent states.
+
+    Works on a parsed description (the parser's Context), before anything
+    is built, so every engine (FSM, Template, Table, compiled) benefits.
+
+    A state is unreachable if no sequence of events leads to it from the
+    first state; DEFAULT event targets are reachable from any state.
+
+    Two states are equivalent if they have the same ENTER, EXIT, TIMEOUT and
+    DEFERs, the same events with the same actions, and each event either
+    stays in the state or goes to equivalent states. Equivalence is found by
+    partition refinement: states are split by their routines and events,
+    then the blocks are split again by the blocks their events lead to,
+    until nothing changes. Each block is replaced by its first defined state.
+
+    Merging is observable through state names (FSM.state, on_state_change,
+    trace), which is why it is a separate, optional step:
+
+        parser = Parser.parse('machine.fsm')
+        report = parser.minimize()
+        fsm = parser.compile()
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+
+from fsm.actions import Event, State
+from fsm.FSM import DEFAULT
+
+
+# result of minimize
+#   unreachable -- list of removed state names, in definition order
+#   merged -- dict of removed state name: name of the equivalent state kept
+MINIMIZED = namedtuple('MINIMIZED', 'unreachable merged')
+
+
+def reachable(ctx):
+    """Return the set of state names reachable from ctx.first_state."""
+    states = ctx.states
+    found = set()
+    if ctx.first_state is None:
+        return found
+    pending = [ctx.first_state]
+    if DEFAULT in states:
+        pending.extend(
+            event.next_state for event in states[DEFAULT].events.values()
+            if event.next_state
+        )
+    while pending:
+        name = pending.pop()
+        if name in found or name not in states:
+            continue
+        found.add(name)
+        pending.extend(
+            event.next_state for event in states[name].events.values()
+            if event.next_state and event.next_state not in found
+        )
+    return found
+
+
+def _signature(state):
+    events = frozenset(
+        (event.name, tuple(event.actions), event.next_state is None)
+        for event in state.events.values()
+    )
+    return (
+        state.enter, state.exit, state.timeout, frozenset(state.defer), events
+    )
+
+
+def equivalent(states):
+    """Return a dict of block number by state name.
+
+        Arguments:
+        states -- list of fsm.actions.State, excluding DEFAULT, whose
+                  events only lead to states in the list
+    """
+    numbers = {}
+    block = {
+        state.name: numbers.setdefault(_signature(state), len(numbers))
+        for state in states
+    }
+    while True:
+        numbers = {}
+        refined = {}
+        for state in states:
+            key = (block[state.name], frozenset(
+                (event.name, block.get(event.next_state, event.next_state))
+                for event in state.events.values() if event.next_state
+            ))
+            refined[state.name] = numbers.setdefault(key, len(numbers))
+        if len(numbers) == len(set(block.values())):
+            return refined
+        block = refined
+
+
+def minimize(ctx):
+    """Minimize the states of a parsed description.
+
+        ctx.states is replaced with a new dict; the State and Event objects
+        of the original are not changed (they may be shared with the parse
+        cache).
+
+        Arguments:
+        ctx -- fsm.actions.Context
+
+        Returns:
+        MINIMIZED
+    """
+    found = reachable(ctx)
+    unreachable = [
+        name for name in ctx.states if name != DEFAULT and name not in found
+    ]
+    states = [
+        state for name, state in ctx.states.items()
+        if name != DEFAULT and name in found
+    ]
+
+    kept = {}  # block number: name of first state in block
+    rename = {}
+    for name, number in equivalent(states).items():
+        rename[name] = kept.setdefault(number, name)
+    merged = {old: new for old, new in rename.items() if old != new}
+
+    result = {}
+    for name, state in ctx.states.items():
+        if name != DEFAULT and rename.get(name) != name:
+            continue
+        copy = result[name] = State(name)
+        copy.enter = state.enter
+        copy.exit = state.exit
+        copy.timeout = state.timeout
+        copy.defer = list(state.defer)
+        for event in state.events.values():
+            new = copy.events[event.name] = Event(
+                event.name, rename.get(event.next_state, event.next_state))
+            new.actions = list(event.actions)
+    ctx.states = result
+
+    return MINIMIZED(unreachable, merged)
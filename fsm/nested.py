@@ -0,0 +1,124 @@
+"""Flatten nested states into a plain state graph.
+
+    A STATE with a PARENT directive is nested in the parent state:
+
+        STATE connected
+            EXIT hang_up
+            EVENT drop idle
+        STATE handshake
+            PARENT connected
+            ENTER send_hello
+            EVENT ready open
+
+    A nested state has all the events of its parent (and the parent's
+    parent, and so on), unless it defines an event of the same name itself.
+
+    A transition exits states from the current state outwards, and enters
+    states inwards to the target, stopping at the innermost state that
+    contains both (a transition to the current state, or to a state it is
+    nested in, exits and enters that state again). The machine is only ever
+    in the innermost state; fsm.state is its name.
+
+    flatten runs on the parsed description, so every engine (FSM, Template,
+    Table, compiled, Vector) sees an ordinary machine and dispatch does not
+    depend on how deeply states are nested. Each state gets its own copy of
+    the events it inherits, with the EXIT routines of the transition and the
+    ENTER routines of the states around the target appended to the event's
+    actions; the target's own ENTER runs, as usual, after the state change.
+    DEFAULT events with a next state are copied into every state, so the
+    same applies to them (they are no longer traced as default events).
+    A nested state also defers the events its outer states DEFER.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from fsm.actions import CircularParent, Event, State, UndefinedParent
+from fsm.FSM import DEFAULT
+
+
+def _path(states, state):
+    """Return the state names from the outermost state in to state."""
+    path = [state.name]
+    while state.parent is not None:
+        parent = states.get(state.parent)
+        if parent is None or parent.name == DEFAULT:
+            raise UndefinedParent(state.parent, state.parent_line)
+        if parent.name in path:
+            raise CircularParent(parent.name, state.parent_line)
+        path.append(parent.name)
+        state = parent
+    path.reverse()
+    return path
+
+
+def _transition(event, source, paths, states):
+    """Return a copy of event with the exit and enter routines it runs."""
+    new = Event(event.name, event.next_state)
+    new.actions = list(event.actions)
+    target = paths.get(event.next_state)
+    if target is None:
+        return new  # no transition, or undefined state
+
+    common = 0
+    while common < min(len(source), len(target)) and \
+            source[common] == target[common]:
+        common += 1
+    common = min(common, len(source) - 1, len(target) - 1)
+
+    new.actions.extend(
+        states[name].exit for name in reversed(source[common:])
+        if states[name].exit
+    )
+    new.actions.extend(
+        states[name].enter for name in target[common:-1]
+        if states[name].enter
+    )
+    return new
+
+
+def flatten(ctx):
+    """Replace the nested states of a parsed description with plain ones.
+
+        Arguments:
+        ctx -- fsm.actions.Context
+
+        Raises:
+        UndefinedParent -- if a PARENT state is not defined
+        CircularParent -- if a state is nested in itself
+    """
+    states = ctx.states
+    paths = {
+        name: _path(states, state) for name, state in states.items()
+        if name != DEFAULT
+    }
+    default = [
+        event for event in states[DEFAULT].events.values() if event.next_state
+    ] if DEFAULT in states else []
+
+    result = {}
+    for name, state in states.items():
+        if name == DEFAULT:
+            result[name] = state
+            continue
+        path = paths[name]
+
+        # --- inner states override the events of outer states
+        events = {}
+        for outer in path:
+            events.update(states[outer].events)
+        for event in default:
+            events.setdefault(event.name, event)
+
+        copy = result[name] = State(name)
+        copy.enter = state.enter
+        copy.timeout = state.timeout
+        for outer in path:
+            copy.defer.extend(
+                name for name in states[outer].defer
+                if name not in copy.defer
+            )
+        copy.parent = state.parent
+        copy.parent_line = state.parent_line
+        for event in events.values():
+            copy.events[event.name] = _transition(event, path, paths, states)
+    ctx.states = result
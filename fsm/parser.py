@@ -6,11 +6,20 @@ from __future__ import absolute_import
 from functools import partial
 
 from ergaleia.load_from_path import load_lines_from_path
+from ergaleia.normalize_path import normalize_path
 from ergaleia.un_comment import un_comment
 
 import fsm.actions as fsm_actions
+from fsm.actions import resolve
+from fsm.aio import AsyncFSM
+from fsm.cache import Cache
+import fsm.compiler as compiler
 from fsm.fsm_machine import create as create_machine
 import fsm.FSM as FSM
+from fsm.minimize import minimize
+from fsm.nested import flatten
+from fsm.table import Table
+from fsm.template import Template
 
 
 class UnexpectedDirective(Exception):
@@ -21,23 +30,79 @@ class UnexpectedDirective(Exception):
         )
 
 
+# names of the parser's action routines (fsm.actions.act_<name>)
+ROUTINES = (
+    'action', 'context', 'default', 'defer', 'enter', 'event', 'exception',
+    'exit', 'handler', 'parent', 'state', 'timeout',
+)
+
+_DIRECTIVES = {}
+
+
+def _directives():
+    """Return the parser's fsm as a table, built once.
+
+        {state: {directive: (routine names, next state)}}, with DEFAULT
+        events merged in and exit/enter routines in the order FSM.handle
+        would run them.
+    """
+    if not _DIRECTIVES:
+        machine = create_machine(**{name: name for name in ROUTINES})
+        default = machine.states[FSM.DEFAULT].events \
+            if FSM.DEFAULT in machine.states else {}
+        for state in machine.states.values():
+            if state.name == FSM.DEFAULT:
+                continue
+            events = dict(default)
+            events.update(state.events)
+            row = _DIRECTIVES[state.name] = {}
+            for name, event in events.items():
+                routines = list(event.actions)
+                next_state = state
+                if event.next_state:
+                    if state.exit:
+                        routines.append(state.exit)
+                    next_state = event.next_state
+                    if next_state.enter:
+                        routines.append(next_state.enter)
+                row[name] = (tuple(routines), next_state.name)
+    return _DIRECTIVES
+
+
+def _lines(data):
+    """Yield lines from a filename, filepath, file or iterable of lines."""
+    if isinstance(data, str):
+        with open(normalize_path(data, 'fsm')) as source:
+            for line in source:
+                yield line
+    else:
+        for line in data:
+            yield line
+
+
 class Parser(object):
     """FSM description file parser."""
 
+    cache = Cache()  # parsed description file cache, None to disable
+
     def __init__(self):
 
         self.ctx = fsm_actions.Context()
+        self.context = None
 
         self.fsm = create_machine(
             action=partial(fsm_actions.act_action, self.ctx),
             context=partial(fsm_actions.act_context, self.ctx),
             default=partial(fsm_actions.act_default, self.ctx),
+            defer=partial(fsm_actions.act_defer, self.ctx),
             enter=partial(fsm_actions.act_enter, self.ctx),
             event=partial(fsm_actions.act_event, self.ctx),
             exception=partial(fsm_actions.act_exception, self.ctx),
             exit=partial(fsm_actions.act_exit, self.ctx),
             handler=partial(fsm_actions.act_handler, self.ctx),
+            parent=partial(fsm_actions.act_parent, self.ctx),
             state=partial(fsm_actions.act_state, self.ctx),
+            timeout=partial(fsm_actions.act_timeout, self.ctx),
         )
         self.fsm.state = 'init'
 
@@ -90,19 +155,48 @@ class Parser(object):
         self.ctx.exception = value
 
     @classmethod
-    def parse(cls, data):
+    def parse(cls, data, lazy=False):
         """Parse an fsm description file.
 
+            If data is a filename or filepath and Parser.cache is set, the
+            parsed description is taken from, or saved to, the cache.
+
             Arguments:
             data --- list, file, filename or filepath
+
+            Keyword Arguments:
+            lazy -- if True, HANDLER, CONTEXT and EXCEPTION paths are
+                    imported on first use (or by bind/build) instead of
+                    while parsing; import errors still report the line
         """
+        if isinstance(data, str) and cls.cache is not None:
+            return cls._parse_cached(data, lazy)
+        return cls._parse(load_lines_from_path(data, 'fsm'), lazy)
+
+    @classmethod
+    def _parse_cached(cls, data, lazy):
+        filename = normalize_path(data, 'fsm')
+        with open(filename, 'rb') as source:
+            content = source.read()
+        ctx = cls.cache.get(filename, content)
+        if ctx is None:
+            # --- cache the description without importing anything
+            parser = cls._parse(content.decode().splitlines(), lazy=True)
+            cls.cache.put(filename, content, parser.ctx)
+        else:
+            parser = cls()
+            parser.ctx = ctx
+        parser.ctx.lazy = lazy
+        if not lazy:
+            parser.ctx.resolve()
+        return parser
+
+    @classmethod
+    def _parse(cls, lines, lazy=False):
         parser = cls()
         ctx = parser.ctx
-        for num, line in enumerate(
-                un_comment(
-                    load_lines_from_path(data, 'fsm')
-                ),
-                start=1):
+        ctx.lazy = lazy
+        for num, line in enumerate(un_comment(lines), start=1):
             if not line:
                 continue
             line = line.split(' ', 1)
@@ -114,8 +208,69 @@ class Parser(object):
 
             if not parser.fsm.handle(event.lower()):
                 raise UnexpectedDirective(event, num)
+        if ctx.nested:
+            flatten(ctx)
+        return parser
+
+    @classmethod
+    def parse_stream(cls, data, lazy=False):
+        """Parse an fsm description file in a single pass.
+
+            Gives the same result, and raises the same errors, as parse.
+            Lines are read one at a time, and each directive is dispatched
+            through a precomputed table instead of the parser's own fsm,
+            so very large descriptions parse in linear time. The cache
+            is not used.
+
+            Arguments:
+            data --- iterable of lines, file, filename or filepath
+
+            Keyword Arguments:
+            lazy -- see parse
+        """
+        parser = cls()
+        ctx = parser.ctx
+        ctx.lazy = lazy
+        directives = _directives()
+        routines = {
+            name: getattr(fsm_actions, 'act_' + name) for name in ROUTINES
+        }
+
+        state = parser.fsm.state
+        for num, line in enumerate(_lines(data), start=1):
+            line = un_comment(line) if '#' in line else line.strip()
+            if not line:
+                continue
+            line = line.split(' ', 1)
+            if len(line) == 1:
+                raise fsm_actions.TooFewTokens(line[0], num)
+
+            event, ctx.line = line
+            ctx.line_num = num
+
+            directive = directives[state].get(event.lower())
+            if directive is None:
+                raise UnexpectedDirective(event, num)
+            names, state = directive
+            for name in names:
+                routines[name](ctx)
+
+        parser.fsm.state = state
+        if ctx.nested:
+            flatten(ctx)
         return parser
 
+    def minimize(self):
+        """Remove unreachable states and merge equivalent states.
+
+            Call after parse and before compile or build. States merged
+            into an equivalent state are no longer available by name.
+
+            Returns:
+            fsm.minimize.MINIMIZED
+        """
+        return minimize(self.ctx)
+
     def compile(self, *args, **kwargs):
         """Bind and build and FSM from a parsed fsm.
 
@@ -125,9 +280,11 @@ class Parser(object):
            parse() + compile() == load()
         """
         handlers = self.ctx.handlers.copy()
+        exception = self.ctx.exception
         self.bind(*args, **kwargs)
         fsm = self.build(**self.ctx.handlers)
         self.ctx.handlers = handlers
+        self.ctx.exception = exception
         return fsm
 
     @classmethod
@@ -146,6 +303,19 @@ class Parser(object):
         p.bind(*args, **kwargs)
         return p.build(**p.ctx.handlers)
 
+    @classmethod
+    def load_async(cls, path, *args, **kwargs):
+        """Parse, bind and build an AsyncFSM from an fsm description file.
+
+            Arguments are the same as load.
+
+            Returns:
+            fsm.aio.AsyncFSM
+        """
+        p = cls.parse(path)
+        p.bind(*args, **kwargs)
+        return p.build_async(**p.ctx.handlers)
+
     def bind(self, *args, **kwargs):
         """Bind the context to the action routines.
 
@@ -154,6 +324,7 @@ class Parser(object):
             and bound to each action routine and the exception routine as the
             first argument.
         """
+        self.ctx.resolve()
         if self.ctx.context:
             self.context = self.ctx.context(*args, **kwargs)
             for n, h in self.handlers.items():
@@ -167,18 +338,82 @@ class Parser(object):
             Keyword arguments:
             **actions -- each action routine callable
         """
+        return self._build(FSM.FSM, actions)
+
+    def build_async(self, **actions):
+        """Construct an AsyncFSM from a parsed fsm description file.
+
+            Action, enter, exit and EXCEPTION routines may be coroutine
+            functions. See fsm.aio.
+
+            Keyword arguments:
+            **actions -- each action routine callable
+        """
+        return self._build(AsyncFSM, actions)
+
+    def _build(self, cls, actions):
+        fsm = cls(self._graph(actions).values())
+        fsm.state = self.first_state
+        fsm.context = self.context
+        fsm.exception = resolve(self.exception)
+        return fsm
+
+    def template(self, **actions):
+        """Construct a shareable Template from a parsed fsm description file.
+
+            The Template holds the state/event graph once; each call to
+            Template.instance creates a lightweight machine that shares it.
+            Action routines are not bound to a context; the instance's
+            context, if the description has a CONTEXT, is passed as the
+            first argument on each call.
+
+            Keyword arguments:
+            **actions -- action routine callables, overriding any HANDLER
+        """
+        handlers = self.handlers.copy()
+        handlers.update(actions)
+        return Template(
+            self._graph(handlers).values(),
+            self.first_state,
+            context=resolve(self.ctx.context),
+            exception=resolve(self.ctx.exception),
+        )
+
+    def table(self, **actions):
+        """Construct an integer-indexed Table from a parsed fsm description.
+
+            Keyword arguments:
+            **actions -- action routine callables, overriding any HANDLER
+        """
+        return Table(self.template(**actions))
+
+    def specialize(self, **actions):
+        """Generate a specialized Machine class from a parsed description.
+
+            See fsm.compiler. Create machines with Machine.instance(context).
+
+            Keyword arguments:
+            **actions -- action routine callables, overriding any HANDLER
+        """
+        return compiler.specialize(self, **actions)
+
+    def _graph(self, actions):
+        """Return a dict of FSM.STATE by name, linked by FSM.EVENTs."""
         states = {}
         for state in self.states.values():
             s = FSM.STATE(
                 name=state.name,
-                on_enter=actions[state.enter] if state.enter else None,
-                on_exit=actions[state.exit] if state.exit else None,
+                on_enter=resolve(actions[state.enter]) if state.enter
+                else None,
+                on_exit=resolve(actions[state.exit]) if state.exit else None,
+                timeout=state.timeout,
+                defer=frozenset(state.defer) if state.defer else None,
             )
             states[s.name] = s
             for event in state.events.values():
                 e = FSM.EVENT(
                     name=event.name,
-                    actions=[actions[n] for n in event.actions],
+                    actions=[resolve(actions[n]) for n in event.actions],
                     next_state=event.next_state,
                 )
                 s.events[e.name] = e
@@ -186,11 +421,7 @@ class Parser(object):
             for event in state.events.values():
                 if event.next_state:
                     event.next_state = states[event.next_state]
-        fsm = FSM.FSM(states.values())
-        fsm.state = self.first_state
-        fsm.context = self.context
-        fsm.exception = self.exception
-        return fsm
+        return states
 
     @staticmethod
     def _define(state):
@@ -0,0 +1,118 @@
+"""Hot reload of an fsm description file under live instances.
+
+    A Reloader owns a Template for an fsm file and keeps track of the
+    Instances created from it, whether by Reloader.instance,
+    Template.instance or fsm.snapshot.restore (through the Template's
+    on_instance hook). When the file changes, the description is
+    parsed again and the new graph is swapped into the Template; each live
+    Instance keeps its current state, by name. If any live Instance is in a
+    state the new description no longer defines, the reload fails and the
+    old graph is left in place.
+
+    The new graph is published to the Template in one assignment, but live
+    Instances are then moved one at a time, and moving an Instance does not
+    wait for an event it is handling. Call reload (or check) from the thread
+    that drives the Instances, between events. The lock only keeps two
+    reloads from overlapping.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+import os
+import threading
+import weakref
+
+from ergaleia.normalize_path import normalize_path
+
+from fsm.parser import Parser
+from fsm.template import Instance
+
+
+class StateRemoved(Exception):
+    """Reload would remove a state that a live instance is in."""
+    def __init__(self, states):
+        super(StateRemoved, self).__init__(
+            'live state(s) removed by reload: {}'.format(', '.join(states))
+        )
+
+
+class ReloadableInstance(Instance):
+    """Instance that can be tracked (weakly) by a Reloader."""
+
+    __slots__ = ('__weakref__',)
+
+
+class Reloader(object):
+    """Template for an fsm description file, reloaded when it changes
+
+        Arguments:
+        path -- filename, filepath or dot-separated path of an fsm file
+
+        Keyword Arguments:
+        **actions -- action routine callables, overriding any HANDLER
+    """
+
+    def __init__(self, path, **actions):
+        self.path = path
+        self.actions = actions
+        self.filename = normalize_path(path, 'fsm')
+        self._lock = threading.Lock()
+        self._instances = weakref.WeakSet()
+        self._signature = self._stat()
+        self.template = Parser.parse(path).template(**actions)
+        self.template.instance_class = ReloadableInstance
+        self.template.on_instance = self._instances.add
+
+    def _stat(self):
+        stat = os.stat(self.filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def instances(self):
+        """Return the number of live instances."""
+        return len(self._instances)
+
+    def instance(self, context=None):
+        """Create a new, tracked Instance (see Template.instance)."""
+        return self.template.instance(context)
+
+    def changed(self):
+        """Return True if the fsm file has changed since the last load."""
+        return self._stat() != self._signature
+
+    def check(self):
+        """Reload if the fsm file has changed; return True if reloaded."""
+        if not self.changed():
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        """Parse the fsm file again and move all live instances to it.
+
+            Must not run while an instance is handling an event (see above).
+            An instance in a state with a TIMEOUT has its timer restarted.
+            The parse cache means an unchanged file is not parsed again.
+
+            Raises:
+            StateRemoved -- if a live instance's state is no longer defined
+        """
+        with self._lock:
+            signature = self._stat()
+            template = Parser.parse(self.path).template(**self.actions)
+            states = template.states
+            live = list(self._instances)
+
+            missing = sorted(set(
+                instance.state for instance in live
+                if instance.state not in states))
+            if missing:
+                raise StateRemoved(missing)
+
+            self.template.replace(template)
+            timers = self.template.timers is not None
+            for instance in live:
+                instance._state = states[instance._state.name]
+                if timers:
+                    instance._arm()  # with the reloaded TIMEOUT
+            self._signature = signature
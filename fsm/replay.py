@@ -0,0 +1,308 @@
+"""Record events handled by a machine, and replay them against a new build.
+
+    A Recorder stands in front of a machine, like fsm.mailbox.Mailbox: each
+    event passed to its handle method is handled by the machine and then
+    appended to a binary log, with a timestamp, a payload reference and
+    the state the machine was left in (an event whose handling raises is
+    recorded too, flagged as raised, before the exception propagates).
+    Records are buffered and written in batches.
+
+    replay memory-maps a log and feeds its events, at full speed, through
+    a machine built from (possibly) a newer description, comparing the state
+    after each event with the recorded one:
+
+        with Recorder('session.log', fsm) as recorder:
+            recorder.handle('press')
+        ...
+        result = replay('session.log', Parser.load('light.fsm'))
+        if result.divergence:
+            print(result.divergence)
+
+    The log is a header followed by records, integers little-endian:
+
+        header      magic, version
+        name        type=1, length, id, utf-8 name (event and state names,
+                    each written once, before first use)
+        start       type=2, state id (the machine's state when recording
+                    started)
+        event       type=3, handled, raised, event id, state id, timestamp
+                    (ns), payload reference
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+import mmap
+import os
+import struct
+import time
+
+
+MAGIC = b'FSMR'
+VERSION = 1
+HEADER = struct.Struct('<4sH')
+NAME = struct.Struct('<BxHI')
+START = struct.Struct('<BxxxI')
+EVENT = struct.Struct('<B??xIIqQ')
+
+_NAME, _START, _EVENT = 1, 2, 3
+
+# one recorded event
+#   timestamp -- nanoseconds since the epoch
+#   event -- event name, or None where recording started in state
+#   state -- state name after the event was handled
+#   handled -- value returned by handle
+#   payload -- payload reference (an int, see Recorder)
+#   raised -- True if handle raised an exception
+RECORD = namedtuple(
+    'RECORD', 'timestamp event state handled payload raised')
+
+# first difference found by replay
+#   index -- index of the event in the log
+#   event -- event name
+#   expected -- recorded (state, handled, raised)
+#   actual -- replayed (state, handled, raised)
+DIVERGENCE = namedtuple('DIVERGENCE', 'index event expected actual')
+
+# result of replay
+#   count -- number of events replayed without a difference
+#   elapsed -- seconds spent replaying
+#   rate -- events per second
+#   divergence -- DIVERGENCE, or None
+REPLAY = namedtuple('REPLAY', 'count elapsed rate divergence')
+
+
+class BadLog(Exception):
+    """File is not an event log, or is from an unsupported version."""
+    def __init__(self, path):
+        super(BadLog, self).__init__(
+            'not a valid event log: {}'.format(path)
+        )
+
+
+class Recorder(object):
+    """Record the events handled by a machine
+
+        Arguments:
+        path -- log filename; appended to if it exists (a record cut short
+                at the end, eg by a crash, is dropped first)
+        fsm -- machine with a handle method and a state name
+
+        Keyword Arguments:
+        payload -- called with (args, kwargs) of each event, returns an int
+                   reference to the payload (eg, an offset in a separate
+                   store); if None, 0 is recorded
+        batch -- number of events buffered before a write
+        clock -- returns the timestamp, in nanoseconds
+    """
+
+    def __init__(self, path, fsm, payload=None, batch=1000,
+                 clock=time.time_ns):
+        self.fsm = fsm
+        self.payload = payload
+        self.batch = batch
+        self.clock = clock
+        self._names = {}
+        self._buffer = bytearray()
+        self._count = 0
+        end = 0
+        if os.path.exists(path) and os.path.getsize(path):
+            self._names, end = _scan(path)
+        self._file = open(path, 'ab')
+        if self._file.tell() > end:
+            self._file.truncate(end)  # drop a record torn by a crash
+        if end == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION))
+        self._buffer += START.pack(_START, self._name(fsm.state))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _name(self, name):
+        number = self._names.get(name)
+        if number is None:
+            number = self._names[name] = len(self._names)
+            data = name.encode()
+            self._buffer += NAME.pack(_NAME, len(data), number) + data
+        return number
+
+    def handle(self, event, *args, **kwargs):
+        """Handle an event with the machine, and record it.
+
+            Arguments are the same as fsm.FSM.FSM.handle.
+        """
+        timestamp = self.clock()
+        try:
+            handled = self.fsm.handle(event, *args, **kwargs)
+        except Exception:
+            self._record(event, args, kwargs, timestamp, False, True)
+            raise
+        self._record(event, args, kwargs, timestamp, handled, False)
+        return handled
+
+    def _record(self, event, args, kwargs, timestamp, handled, raised):
+        self._buffer += EVENT.pack(
+            _EVENT, bool(handled), raised, self._name(event),
+            self._name(self.fsm.state), timestamp,
+            self.payload(args, kwargs) if self.payload else 0)
+        self._count += 1
+        if self._count >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the log."""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer = bytearray()
+        self._count = 0
+
+    def close(self):
+        """Write buffered records and close the log."""
+        self.flush()
+        self._file.close()
+
+
+def _scan(path):
+    """Return the dict of name: id already written to a log, and the offset
+        just past its last whole record.
+    """
+    with Log(path) as log:
+        for _ in log:
+            pass
+        names = {name: number for number, name in enumerate(log.names)}
+        return names, log.end
+
+
+class Log(object):
+    """Memory-mapped event log
+
+        Arguments:
+        path -- log filename
+
+        Iterate for RECORDs; names is filled in as they are read. A record
+        cut short at the end of the file (eg, by a crash) is ignored; once
+        iteration is complete, end is the offset just past the last whole
+        record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = None
+        self.names = []
+        self.end = HEADER.size
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise BadLog(path)
+        self._map = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise BadLog(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        data = self._map
+        names = self.names = []
+        unpack = EVENT.unpack_from
+        offset = HEADER.size
+        end = len(data)
+        while offset < end:
+            kind = data[offset]
+            if kind == _EVENT:
+                if offset + EVENT.size > end:
+                    break
+                _, handled, raised, event, state, timestamp, payload = \
+                    unpack(data, offset)
+                offset += EVENT.size
+                yield RECORD(
+                    timestamp, names[event], names[state], handled, payload,
+                    raised)
+            elif kind == _NAME:
+                if offset + NAME.size > end:
+                    break
+                size = NAME.unpack_from(data, offset)[1]
+                start = offset + NAME.size
+                if start + size > end:
+                    break
+                names.append(bytes(data[start:start + size]).decode())
+                offset = start + size
+            elif kind == _START:
+                if offset + START.size > end:
+                    break
+                state = START.unpack_from(data, offset)[1]
+                offset += START.size
+                yield RECORD(0, None, names[state], None, 0, False)
+            else:
+                raise BadLog(self.path)
+        self.end = offset
+
+    def close(self):
+        """Release the memory map and the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def replay(path, fsm, payload=None):
+    """Feed the events of a log through a machine, stopping at the first
+        difference in the resulting state.
+
+        An event recorded as raised is expected to raise again; the
+        exception is not propagated.
+
+        Arguments:
+        path -- log filename
+        fsm -- machine to replay against; it is put in the recorded state
+               wherever recording started
+
+        Keyword Arguments:
+        payload -- called with a payload reference, returns (args, kwargs)
+                   for the event; if None, events are replayed without a
+                   payload (using fsm.dispatch, if the machine has one)
+
+        Returns:
+        REPLAY
+    """
+    with Log(path) as log:
+        handle = fsm.handle
+        dispatch = getattr(fsm, 'dispatch', handle)
+        divergence = None
+        count = 0
+        start = time.perf_counter()
+        for record in log:
+            if record.event is None:
+                fsm.state = record.state
+                continue
+            raised = False
+            try:
+                if payload:
+                    args, kwargs = payload(record.payload)
+                    handled = bool(handle(record.event, *args, **kwargs))
+                else:
+                    handled = bool(dispatch(record.event))
+            except Exception:  # pylint: disable=broad-except
+                handled, raised = False, True
+            state = fsm.state
+            if state != record.state or handled != record.handled or \
+                    raised != record.raised:
+                divergence = DIVERGENCE(
+                    count, record.event,
+                    (record.state, record.handled, record.raised),
+                    (state, handled, raised))
+                break
+            count += 1
+        elapsed = time.perf_counter() - start
+    return REPLAY(
+        count, elapsed, count / elapsed if elapsed else 0.0, divergence)
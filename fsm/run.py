@@ -0,0 +1,202 @@
+"""Drive keyed machines from a stream of JSON-lines or CSV records.
+
+    Each input record is (key, event, payload). The description is parsed
+    and built into a fsm.template.Template once; the first record for a key
+    creates a lightweight Instance of it, and the event is then handled by
+    that key's Instance. When a machine reaches a final state it is reported
+    and forgotten, so memory holds only the sessions that are still active.
+
+        python -m fsm.run machine.fsm < events.jsonl > report.jsonl
+
+    Input, one record per line:
+
+        jsonl -- {"key": k, "event": e, "payload": p} or [k, e, p]; a list
+                 payload is passed as args, an object as kwargs, anything
+                 else as a single argument (payload is optional)
+        csv -- k,e[,arg...]; args are passed as strings
+
+    Output is JSON lines:
+
+        {"key": k, "state": s, "final": true} when a session ends; sessions
+            still active at the end of input are reported with "final": false
+        {"key": k, "event": e, "state": s, "undefined": true}
+        {"key": k, "event": e, "state": s, "error": message}
+        {"key": k, "from": s, "to": t} with --transitions
+
+    Final states are those given with --final, or by default the states
+    that have no events and that no DEFAULT event leads out of.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+import argparse
+import csv
+import json
+import sys
+
+from fsm.FSM import DEFAULT
+from fsm.parser import Parser
+
+
+CHUNK = 1 << 20  # bytes of input read at a time
+
+
+def lines(stream, size=CHUNK):
+    """Yield lines from stream, reading about size bytes at a time."""
+    while True:
+        chunk = stream.readlines(size)
+        if not chunk:
+            return
+        for line in chunk:
+            yield line
+
+
+def _payload(payload):
+    if payload is None:
+        return (), {}
+    if isinstance(payload, list):
+        return payload, {}
+    if isinstance(payload, dict):
+        return (), payload
+    return (payload,), {}
+
+
+def jsonl(stream):
+    """Yield (key, event, args, kwargs) from JSON lines."""
+    loads = json.loads
+    for line in lines(stream):
+        if not line.strip():
+            continue
+        record = loads(line)
+        if isinstance(record, dict):
+            key, event = record['key'], record['event']
+            payload = record.get('payload')
+        else:
+            key, event = record[0], record[1]
+            payload = record[2] if len(record) > 2 else None
+        args, kwargs = _payload(payload)
+        yield key, event, args, kwargs
+
+
+def csv_records(stream):
+    """Yield (key, event, args, kwargs) from CSV lines."""
+    for row in csv.reader(lines(stream)):
+        if row:
+            yield row[0], row[1], row[2:], {}
+
+
+FORMATS = {'jsonl': jsonl, 'csv': csv_records}
+
+
+class Runner(object):
+    """Registry of machines by key
+
+        Arguments:
+        parser -- fsm.parser.Parser returned from Parser.parse
+
+        Keyword Arguments:
+        final -- collection of final state names (default: see final)
+        transitions -- if True, report each state change
+    """
+
+    def __init__(self, parser, final=None, transitions=False):
+        self.template = parser.template()
+        self.final = frozenset(
+            Runner.default_final(parser) if final is None else final)
+        self.sessions = {}
+        self._changes = []
+        if transitions:
+            changes = self._changes
+
+            def on_state_change(instance, new, old):
+                changes.append((old, new))
+
+            self.template.on_state_change = on_state_change
+
+    @staticmethod
+    def default_final(parser):
+        """Return the names of the states that have no events and that
+            no DEFAULT event leaves.
+        """
+        default = parser.states.get(DEFAULT)
+        leave = set(
+            event.next_state for event in default.events.values()
+            if event.next_state
+        ) if default else set()
+        return [
+            name for name, state in parser.states.items()
+            if name != DEFAULT and not state.events and
+            not leave - {name}
+        ]
+
+    def feed(self, records):
+        """Handle records, yielding report dicts as they are produced.
+
+            Arguments:
+            records -- iterable of (key, event, args, kwargs)
+        """
+        sessions = self.sessions
+        changes = self._changes
+        final = self.final
+        instance = self.template.instance
+        for key, event, args, kwargs in records:
+            fsm = sessions.get(key)
+            if fsm is None:
+                fsm = sessions[key] = instance()
+            state = fsm.state
+            try:
+                handled = fsm.handle(event, *args, **kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                yield {'key': key, 'event': event, 'state': fsm.state,
+                       'error': str(e)}
+                handled = True
+            if changes:
+                for old, new in changes:
+                    yield {'key': key, 'from': old, 'to': new}
+                del changes[:]
+            if not handled:
+                yield {'key': key, 'event': event, 'state': state,
+                       'undefined': True}
+            elif fsm.state in final:
+                del sessions[key]
+                yield {'key': key, 'state': fsm.state, 'final': True}
+
+    def finish(self):
+        """Yield a report for each session still active, and forget them."""
+        for key, fsm in self.sessions.items():
+            yield {'key': key, 'state': fsm.state, 'final': False}
+        self.sessions.clear()
+
+
+def main(argv=None, stdin=None, stdout=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m fsm.run',
+        description='drive keyed machines from JSON-lines or CSV input')
+    parser.add_argument('fsm', help='fsm description file')
+    parser.add_argument(
+        '--format', choices=sorted(FORMATS), default='jsonl',
+        help='input format (default jsonl)')
+    parser.add_argument(
+        '--final', action='append',
+        help='final state name (repeat for more than one)')
+    parser.add_argument(
+        '--transitions', action='store_true', help='report state changes')
+    args = parser.parse_args(argv)
+
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    runner = Runner(
+        Parser.parse(args.fsm), final=args.final,
+        transitions=args.transitions)
+
+    dumps = json.dumps
+    write = stdout.write
+    for report in runner.feed(FORMATS[args.format](stdin)):
+        write(dumps(report) + '\n')
+    for report in runner.finish():
+        write(dumps(report) + '\n')
+    stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
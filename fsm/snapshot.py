@@ -0,0 +1,243 @@
+"""Compact binary snapshot and bulk restore of machine instances.
+
+    A snapshot file holds, for each instance, the index of its current
+    state in a table of state names and, optionally, its pickled context:
+
+        header      magic, version, flags, instance count, names size
+        names       utf-8 state names, newline separated
+        states      uint32 state index per instance (4-byte aligned)
+        offsets     uint64 context offset per instance, plus end (optional)
+        contexts    pickled contexts, back to back (optional)
+
+    Integers are little-endian. The file is read through mmap, so the state
+    indexes of all instances are available without reading the contexts;
+    restore rebuilds Instances against a shared Template without parsing.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from array import array
+import mmap
+import pickle
+import struct
+import sys
+
+
+MAGIC = b'FSMS'
+VERSION = 1
+HAS_CONTEXTS = 1
+HEADER = struct.Struct('<4sHHQI')
+
+
+class UnknownState(Exception):
+    """Snapshot state is not defined by the Template."""
+    def __init__(self, states):
+        super(UnknownState, self).__init__(
+            'snapshot state(s) not in template: {}'.format(', '.join(states))
+        )
+
+
+class BadSnapshot(Exception):
+    """File is not a snapshot, or is from an unsupported version."""
+    def __init__(self, path):
+        super(BadSnapshot, self).__init__(
+            'not a valid snapshot file: {}'.format(path)
+        )
+
+
+def _pad(size, alignment):
+    return -size % alignment
+
+
+def _little(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def save(path, instances, contexts=False):
+    """Write a snapshot of instances.
+
+        Arguments:
+        path -- filename to write
+        instances -- iterable of machines (anything with a state name)
+
+        Keyword Arguments:
+        contexts -- if True, also pickle each instance's context
+    """
+    instances = list(instances)  # iterated twice if contexts
+    names = {}
+    states = array('I')
+    for instance in instances:
+        state = instance.state
+        index = names.get(state)
+        if index is None:
+            index = names[state] = len(names)
+        states.append(index)
+    count = len(states)
+    encoded = '\n'.join(names).encode()
+
+    with open(path, 'wb') as output:
+        output.write(HEADER.pack(
+            MAGIC, VERSION, HAS_CONTEXTS if contexts else 0, count,
+            len(encoded)))
+        output.write(encoded)
+        output.write(b'\0' * _pad(HEADER.size + len(encoded), 8))
+        output.write(_little(states).tobytes())
+        if not contexts:
+            return
+
+        output.write(b'\0' * _pad(count * 4, 8))
+        position = output.tell()
+        output.write(b'\0' * (count + 1) * 8)  # offsets, filled in below
+        offsets = array('Q')
+        offset = 0
+        for instance in instances:
+            data = pickle.dumps(instance.context, pickle.HIGHEST_PROTOCOL)
+            offsets.append(offset)
+            output.write(data)
+            offset += len(data)
+        offsets.append(offset)
+        output.seek(position)
+        output.write(_little(offsets).tobytes())
+
+
+class Snapshot(object):
+    """Memory-mapped snapshot file
+
+        Arguments:
+        path -- snapshot filename
+
+        Attributes:
+        count -- number of instances
+        state_names -- list of state names
+        states -- sequence of state index by instance
+        has_contexts -- True if the snapshot holds contexts
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = None
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise BadSnapshot(path)
+        header = self._map[:HEADER.size]
+        if len(header) < HEADER.size:
+            self.close()
+            raise BadSnapshot(path)
+        magic, version, flags, count, size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise BadSnapshot(path)
+
+        view = memoryview(self._map)
+
+        self.count = count
+        self.has_contexts = bool(flags & HAS_CONTEXTS)
+        offset = HEADER.size
+        names = bytes(view[offset:offset + size]).decode()
+        self.state_names = names.split('\n') if names else []
+        offset += size + _pad(HEADER.size + size, 8)
+
+        self.states = self._array(view, offset, count, 'I')
+        offset += count * 4 + _pad(count * 4, 8)
+        if self.has_contexts:
+            self._offsets = self._array(view, offset, count + 1, 'Q')
+            self._contexts = offset + (count + 1) * 8
+        self._view = view
+
+    @staticmethod
+    def _array(view, offset, count, typecode):
+        size = array(typecode).itemsize
+        data = view[offset:offset + count * size]
+        if sys.byteorder == 'little':
+            return data.cast(typecode)
+        return _little(array(typecode, data.tobytes()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def state(self, index):
+        """Return the state name of an instance."""
+        return self.state_names[self.states[index]]
+
+    def context(self, index):
+        """Return the unpickled context of an instance, or None."""
+        if not self.has_contexts:
+            return None
+        start = self._contexts + self._offsets[index]
+        end = self._contexts + self._offsets[index + 1]
+        return pickle.loads(self._view[start:end])
+
+    def close(self):
+        """Release the memory map and the file."""
+        for attribute in ('states', '_offsets', '_view'):
+            value = self.__dict__.pop(attribute, None)
+            if isinstance(value, memoryview):
+                value.release()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def restore(path, template, cls=None):
+    """Return a list of instances restored from a snapshot file.
+
+        Arguments:
+        path -- snapshot filename
+        template -- fsm.template.Template every instance will share
+
+        Keyword Arguments:
+        cls -- Instance class to create (default template.instance_class)
+
+        Raises:
+        UnknownState -- if a snapshot state is not defined by template
+    """
+    with Snapshot(path) as snapshot:
+        missing = [
+            name for name in snapshot.state_names
+            if name not in template.states
+        ]
+        if missing:
+            raise UnknownState(missing)
+        states = [template.states[name] for name in snapshot.state_names]
+
+        if cls is None:
+            cls = template.instance_class
+        new = cls.__new__
+        instances = []
+        append = instances.append
+        if snapshot.has_contexts:
+            context = snapshot.context
+            for index, state in enumerate(snapshot.states):
+                instance = new(cls)
+                instance.template = template
+                instance._state = states[state]
+                instance.context = context(index)
+                instance._timer = None
+                append(instance)
+        else:
+            for state in snapshot.states:
+                instance = new(cls)
+                instance.template = template
+                instance._state = states[state]
+                instance.context = None
+                instance._timer = None
+                append(instance)
+        if template.timers is not None:
+            for instance in instances:
+                instance._arm()
+        if template.on_instance:
+            for instance in instances:
+                template.on_instance(instance)
+        return instances
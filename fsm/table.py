@@ -0,0 +1,225 @@
+"""Integer-indexed transition table engine.
+
+    State and event names are interned to small integers when the Table is
+    built, and every DEFAULT event is merged into each state's row, so
+    dispatching an event is a pair of list lookups.
+
+    TIMEOUT and DEFER are not supported; a Table is not built from a
+    description that uses them.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+
+from fsm.actions import supported
+from fsm.FSM import DEFAULT
+
+
+_NO_ARGS = ()
+_NO_KWARGS = {}
+
+
+# one cell of a Table: what happens when an event arrives in a state
+#   actions -- tuple of action routines (callables)
+#   next_state -- id of the state to transition to, or None
+#   is_default -- True if the cell came from a DEFAULT event
+TRANSITION = namedtuple('TRANSITION', 'actions next_state is_default')
+
+
+class Table(object):
+    """Dense state x event transition table
+
+        Arguments:
+        template -- fsm.template.Template object
+
+        Raises:
+        fsm.actions.Unsupported -- if a state has a TIMEOUT or DEFER
+
+        Attributes:
+        state_names -- list of state names, indexed by state id
+        state_ids -- dict of state id by name
+        event_names -- list of event names, indexed by event id
+        event_ids -- dict of event id by name
+        rows -- list (by state id) of lists (by event id) of TRANSITION/None
+        enter -- list (by state id) of enter routine or None
+        exit -- list (by state id) of exit routine or None
+    """
+
+    def __init__(self, template):
+        supported('Table', template.states.values())
+        states = [s for s in template.states.values() if s.name != DEFAULT]
+        default = template.default or {}
+
+        self.state_names = [state.name for state in states]
+        self.state_ids = {n: i for i, n in enumerate(self.state_names)}
+
+        names = set(default)
+        for state in states:
+            names.update(state.events)
+        self.event_names = sorted(names)
+        self.event_ids = {n: i for i, n in enumerate(self.event_names)}
+
+        self.enter = [state.enter for state in states]
+        self.exit = [state.exit for state in states]
+
+        self.rows = []
+        for state in states:
+            row = [None] * len(self.event_names)
+            for name, event in default.items():
+                row[self.event_ids[name]] = self._transition(event, True)
+            for name, event in state.events.items():
+                row[self.event_ids[name]] = self._transition(event, False)
+            self.rows.append(row)
+
+        self.first_state = self.state_ids.get(template.first_state.name) \
+            if template.first_state else None
+        self.context = template.context
+        self.exception = template.exception
+
+    def _transition(self, event, is_default):
+        next_state = event.next_state
+        if next_state is not None:
+            next_state = self.state_ids[next_state.name]
+        return TRANSITION(tuple(event.actions), next_state, is_default)
+
+    def instance(self, context=None):
+        """Create a new TableFSM that runs against this Table.
+
+            Keyword Arguments:
+            context -- object passed as the first argument to each action
+                       routine; if None and the description has a CONTEXT,
+                       the CONTEXT is called (with no arguments) to create one
+        """
+        if context is None and self.context:
+            context = self.context()
+        return TableFSM(self, context)
+
+
+class TableFSM(object):
+    """Finite state machine driven by a Table
+
+        Arguments:
+        table -- Table object
+        context -- context object, or None
+
+        The on_state_change, trace and undefined hooks have the same
+        signatures as on fsm.FSM.FSM, but default to None and are skipped
+        entirely when not set.
+    """
+
+    def __init__(self, table, context=None):
+        self.table = table
+        self._state = table.first_state
+        self.context = context
+        self.exception = table.exception
+        self.on_state_change = None
+        self.trace = None
+        self.undefined = None
+
+    @property
+    def state(self):
+        """Return the current state name."""
+        return self.table.state_names[self._state]
+
+    @state.setter
+    def state(self, state):
+        self._state = self.table.state_ids[state]
+
+    @property
+    def state_id(self):
+        """Return the current state id."""
+        return self._state
+
+    def _undefined(self, event, is_internal):
+        state = self.table.state_names[self._state]
+        if self.trace:
+            self.trace(state, event, False, is_internal)
+        if self.undefined:
+            self.undefined(state, event, False, is_internal)
+        return False  # event not handled!
+
+    def handle(self, event, *args, **kwargs):
+        """Handle one event, by name, in the current state.
+
+        Arguments:
+        event -- name of event to handle
+        args -- optional arguments for the first action routine
+        kwargs -- optional keyword arguments for the first action routine
+        """
+        event_id = self.table.event_ids.get(event)
+        if event_id is None:
+            return self._undefined(event, False)
+        return self._dispatch(event_id, args, kwargs)
+
+    def handle_id(self, event_id, *args, **kwargs):
+        """Handle one event, by id, in the current state.
+
+        Arguments:
+        event_id -- id of event to handle (see Table.event_ids)
+        args -- optional arguments for the first action routine
+        kwargs -- optional keyword arguments for the first action routine
+        """
+        return self._dispatch(event_id, args, kwargs)
+
+    def _dispatch(self, event_id, args, kwargs):
+        table = self.table
+        rows = table.rows
+        context = self.context
+        # --- arguments for every routine after the first
+        rest = _NO_ARGS if context is None else (context,)
+        is_internal = False
+
+        while True:
+            state = self._state
+            transition = rows[state][event_id]
+
+            if transition is None:
+                return self._undefined(
+                    table.event_names[event_id], is_internal)
+
+            if self.trace:
+                self.trace(
+                    table.state_names[state], table.event_names[event_id],
+                    transition[2], is_internal)
+
+            if context is not None:
+                args = rest + tuple(args)
+
+            # --- handle, if non-null event is returned, keep going
+            try:
+                event = None
+                actions, next_state, _ = transition
+                for action in actions:
+                    event = action(*args, **kwargs)
+                    args, kwargs = rest, _NO_KWARGS
+
+                if next_state is not None:
+                    exit_routine = table.exit[state]
+                    if exit_routine:
+                        event = exit_routine(*args, **kwargs)
+                        args, kwargs = rest, _NO_KWARGS
+
+                    if self.on_state_change:
+                        self.on_state_change(
+                            table.state_names[next_state],
+                            table.state_names[state])
+                    self._state = next_state
+
+                    enter_routine = table.enter[next_state]
+                    if enter_routine:
+                        event = enter_routine(*args, **kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                if not self.exception:
+                    raise
+                event = self.exception(*(rest + (e,)))
+
+            if not event:
+                return True  # OK
+
+            event_id = table.event_ids.get(event)
+            if event_id is None:
+                return self._undefined(event, True)
+
+            args, kwargs = _NO_ARGS, _NO_KWARGS
+            is_internal = True  # every event after the first is internal
@@ -0,0 +1,232 @@
+"""Shared machine template and lightweight per-session instances.
+
+    A Template holds an immutable state/event graph, built once from a
+    parsed fsm description. Any number of Instances can run against the
+    same Template; each Instance carries only its current state and its
+    context, so creating one is cheap.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from fsm.FSM import DEFAULT, _NO_ARGS, _NO_KWARGS
+
+
+# everything a Template builds from a description, held together so that
+# replace publishes all of it in a single attribute assignment
+#   states -- read-only dict of STATE by name
+#   first_state -- STATE each Instance starts in, or None
+#   default -- dict of DEFAULT events by name, or None
+#   context -- CONTEXT callable, or None
+#   exception -- EXCEPTION handler, or None
+GRAPH = namedtuple('GRAPH', 'states first_state default context exception')
+
+
+class Template(object):
+    """Immutable finite state machine graph
+
+        Arguments:
+        states -- list of STATE objects
+        first_state -- name of the state each Instance starts in
+
+        Keyword Arguments:
+        context -- CONTEXT callable, used by instance() if no context given
+        exception -- EXCEPTION handler (callable)
+
+        Hooks (shared by all instances, None to disable):
+        on_state_change -- called with (instance, new_state, old_state)
+        trace -- called with (instance, state, event, is_default, is_internal)
+        undefined -- called with (instance, state, event, is_internal)
+        timers -- fsm.timer.TimingWheel for TIMEOUTs, set before creating
+                  instances
+        on_instance -- called with each instance created by instance (or
+                       fsm.snapshot.restore)
+
+        Attributes:
+        instance_class -- class of the instances created by instance
+                          (default Instance)
+    """
+
+    def __init__(self, states, first_state, context=None, exception=None):
+        states = {state.name: state for state in states}
+        self.graph = GRAPH(
+            MappingProxyType(states),
+            states[first_state] if first_state else None,
+            states[DEFAULT].events if DEFAULT in states else None,
+            context,
+            exception,
+        )
+        self.on_state_change = None
+        self.trace = None
+        self.undefined = None
+        self.timers = None
+        self.on_instance = None
+        self.instance_class = Instance
+
+    @property
+    def states(self):
+        """Return the read-only dict of STATE by name."""
+        return self.graph.states
+
+    @property
+    def first_state(self):
+        """Return the STATE each Instance starts in."""
+        return self.graph.first_state
+
+    @property
+    def default(self):
+        """Return the dict of DEFAULT events by name, or None."""
+        return self.graph.default
+
+    @property
+    def context(self):
+        """Return the CONTEXT callable, or None."""
+        return self.graph.context
+
+    @property
+    def exception(self):
+        """Return the EXCEPTION handler, or None."""
+        return self.graph.exception
+
+    def replace(self, template):
+        """Replace this Template's graph, in place, with another's.
+
+            The graph is swapped in a single assignment, and Instance.handle
+            reads it once per event, so an event never sees a mix of the
+            two. Hooks are kept. Instances still hold STATE objects from the
+            old graph until they are moved (see fsm.reload).
+        """
+        self.graph = template.graph
+
+    def instance(self, context=None):
+        """Create a new Instance that shares this Template's graph.
+
+            Keyword Arguments:
+            context -- object passed as the first argument to each action
+                       routine; if None and the description has a CONTEXT,
+                       the CONTEXT is called (with no arguments) to create one
+        """
+        if context is None and self.context:
+            context = self.context()
+        instance = self.instance_class(self, context)
+        if self.on_instance:
+            self.on_instance(instance)
+        return instance
+
+
+class Instance(object):
+    """A running machine, sharing the graph of a Template
+
+        Arguments:
+        template -- Template object
+        context -- context object, or None
+    """
+
+    __slots__ = ('template', '_state', 'context', '_timer')
+
+    def __init__(self, template, context=None):
+        self.template = template
+        self._state = template.first_state
+        self.context = context
+        self._timer = None
+        if template.timers is not None:
+            self._arm()
+
+    @property
+    def state(self):
+        """Return the current state name."""
+        return self._state.name
+
+    @state.setter
+    def state(self, state):
+        self._state = self.template.states[state]
+        if self.template.timers is not None:
+            self._arm()
+
+    def _arm(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        timeout = self._state.timeout
+        if timeout:
+            seconds, event = timeout
+            self._timer = self.template.timers.arm(
+                seconds, self.handle, event)
+
+    def _call(self, routine, args, kwargs):
+        if self.context is None:
+            return routine(*args, **kwargs)
+        return routine(self.context, *args, **kwargs)
+
+    def _handle(self, event, args, kwargs):
+        next_event = None
+
+        for action in event.actions:
+            next_event = self._call(action, args, kwargs)
+            args, kwargs = _NO_ARGS, _NO_KWARGS
+
+        if event.next_state:
+            if self._state.exit:
+                next_event = self._call(self._state.exit, args, kwargs)
+                args, kwargs = _NO_ARGS, _NO_KWARGS
+
+            on_state_change = self.template.on_state_change
+            if on_state_change:
+                on_state_change(
+                    self, event.next_state.name, self._state.name)
+            self._state = event.next_state
+            if self.template.timers is not None:
+                self._arm()
+
+            if self._state.enter:
+                next_event = self._call(self._state.enter, args, kwargs)
+
+        return next_event
+
+    def handle(self, event, *args, **kwargs):
+        """Handle one event in the current state.
+
+        Arguments:
+        event -- name of event to handle
+        args -- optional arguments for the first action routine
+        kwargs -- optional keyword arguments for the first action routine
+        """
+        template = self.template
+        graph = template.graph
+        default = graph.default
+        is_internal = False
+
+        while event:
+            is_default = False
+
+            # --- locate event handler, or default event handler
+            state_event = self._state.events.get(event)
+            if state_event is None and default is not None:
+                state_event = default.get(event)
+                is_default = state_event is not None
+
+            if template.trace:
+                template.trace(
+                    self, self._state.name, event, is_default, is_internal)
+
+            # --- no event handler
+            if state_event is None:
+                if template.undefined:
+                    template.undefined(
+                        self, self._state.name, event, is_internal)
+                return False  # event not handled!
+
+            # --- handle, if non-null event is returned, keep going
+            try:
+                event = self._handle(state_event, args, kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                if not graph.exception:
+                    raise
+                event = self._call(graph.exception, (e,), _NO_KWARGS)
+
+            args, kwargs = _NO_ARGS, _NO_KWARGS
+            is_internal = True  # every event after the first is internal
+
+        return True  # OK
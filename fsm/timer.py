@@ -0,0 +1,150 @@
+"""Hashed timing wheel for state timeouts.
+
+    A state with a TIMEOUT directive arms a timer when it is entered, and
+    cancels it when it is exited; if the timer expires first, the TIMEOUT
+    event is handled by the machine:
+
+        STATE handshake
+            TIMEOUT 2.5 expired
+            EVENT expired closed
+            ...
+
+    Timers are kept in one TimingWheel shared by any number of machines.
+    Arm and cancel are O(1) (a dict insert and delete in one slot of the
+    wheel), so millions of pending timers cost only their Timer objects.
+    Timers expire on the tick after they are due, so resolution is one
+    tick.
+
+    The wheel does not run by itself. A synchronous program calls advance
+    from its own loop; an asyncio program runs the run coroutine as a task,
+    which also awaits AsyncFSM.handle:
+
+        wheel = TimingWheel()
+        fsm.timers = wheel  # or template.timers = wheel
+        ...
+        wheel.advance()  # or: asyncio.ensure_future(wheel.run())
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+import asyncio
+from inspect import isawaitable
+import math
+import time
+
+
+class Timer(object):
+    """Pending timer in a TimingWheel; see TimingWheel.arm."""
+
+    __slots__ = ('bucket', 'rounds', 'callback', 'args')
+
+    def __init__(self, bucket, rounds, callback, args):
+        self.bucket = bucket
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+
+    @property
+    def active(self):
+        """Return True if the timer has not expired or been cancelled."""
+        return self in self.bucket
+
+    def cancel(self):
+        """Cancel the timer, if it is still pending."""
+        self.bucket.pop(self, None)
+
+
+class TimingWheel(object):
+    """Hashed timing wheel
+
+        Keyword Arguments:
+        tick -- seconds per slot, the timer resolution (default 0.1)
+        size -- number of slots (default 1024); timers further away than
+                size ticks wait in their slot for extra turns of the wheel
+        clock -- function returning the current time in seconds
+    """
+
+    def __init__(self, tick=0.1, size=1024, clock=time.monotonic):
+        self.tick = tick
+        self.size = size
+        self.clock = clock
+        self.slots = [{} for _ in range(size)]
+        self.position = 0
+        self.time = clock()  # time of the current slot
+
+    def __len__(self):
+        """Return the number of pending timers."""
+        return sum(len(slot) for slot in self.slots)
+
+    def arm(self, seconds, callback, *args):
+        """Call callback(*args) after seconds; return a Timer."""
+        ticks = max(1, math.ceil(
+            (self.clock() - self.time + seconds) / self.tick))
+        bucket = self.slots[(self.position + ticks) % self.size]
+        timer = Timer(bucket, (ticks - 1) // self.size, callback, args)
+        bucket[timer] = None
+        return timer
+
+    def expired(self, now=None):
+        """Remove and return the Timers due by now, in order of expiry."""
+        if now is None:
+            now = self.clock()
+        due = []
+        while now - self.time >= self.tick:
+            self.time += self.tick
+            self.position = (self.position + 1) % self.size
+            bucket = self.slots[self.position]
+            for timer in list(bucket):
+                if timer.rounds:
+                    timer.rounds -= 1
+                else:
+                    del bucket[timer]
+                    due.append(timer)
+        return due
+
+    def advance(self, now=None):
+        """Run the callbacks of the timers due by now; return the count.
+
+            Every due callback is run; if any raise, the first exception is
+            raised once they are done. A callback which returns an awaitable
+            (eg, AsyncFSM.handle) is an error, since advance cannot await
+            it: use run instead.
+        """
+        due = self.expired(now)
+        error = None
+        for timer in due:
+            try:
+                result = timer.callback(*timer.args)
+                if isawaitable(result):
+                    if hasattr(result, 'close'):
+                        result.close()  # never awaited
+                    raise TypeError(
+                        'timer callback returned an awaitable; use'
+                        ' TimingWheel.run with asyncio')
+            except Exception as e:  # pylint: disable=broad-except
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return len(due)
+
+    async def run(self):
+        """Advance the wheel every tick, awaiting awaitable callbacks.
+
+            An exception from a callback is passed to the event loop's
+            exception handler (which logs it, by default) and the wheel
+            keeps running.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.tick)
+            for timer in self.expired():
+                try:
+                    result = timer.callback(*timer.args)
+                    if isawaitable(result):
+                        await result
+                except Exception as e:  # pylint: disable=broad-except
+                    loop.call_exception_handler({
+                        'message': 'timer callback failed',
+                        'exception': e,
+                    })
@@ -0,0 +1,172 @@
+"""Fixed-size binary trace ring buffer.
+
+    A TraceRing records (timestamp, state id, event id, is_default,
+    is_internal) for each event an FSM handles into preallocated arrays,
+    overwriting the oldest records when full. State and event names are
+    interned to small ids the first time they are seen. The ring can be
+    read or written out on demand, or automatically when an action raises
+    an exception.
+
+        ring = TraceRing(4096)
+        ring.attach(fsm, on_exception=lambda ring, e: ring.write(path))
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from array import array
+from collections import namedtuple
+import struct
+import time
+
+
+IS_DEFAULT = 1
+IS_INTERNAL = 2
+
+MAGIC = b'FSMT'
+HEADER = struct.Struct('<4sII')  # magic, record count, names size
+
+# one trace record, with ids converted back to names
+RECORD = namedtuple(
+    'RECORD', 'timestamp state event is_default is_internal')
+
+
+class TraceRing(object):
+    """Preallocated ring buffer of trace records
+
+        Arguments:
+        size -- maximum number of records kept
+
+        The object is callable with the fsm.FSM.FSM trace signature
+        (state, event, is_default, is_internal).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.timestamps = array('q', bytes(8 * size))
+        self.states = array('I', bytes(4 * size))
+        self.events = array('I', bytes(4 * size))
+        self.flags = array('B', bytes(size))
+        self.names = []
+        self._ids = {}
+        self._next = 0
+        self.count = 0  # total records written, including overwritten
+
+    def _id(self, name):
+        ident = self._ids.get(name)
+        if ident is None:
+            ident = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return ident
+
+    def __call__(self, state, event, is_default, is_internal):
+        index = self._next
+        ids = self._ids
+        self.timestamps[index] = time.monotonic_ns()
+        self.states[index] = ids[state] if state in ids else self._id(state)
+        self.events[index] = ids[event] if event in ids else self._id(event)
+        self.flags[index] = \
+            (IS_DEFAULT if is_default else 0) | \
+            (IS_INTERNAL if is_internal else 0)
+        index += 1
+        self._next = 0 if index == self.size else index
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def _order(self):
+        """Return record indexes, oldest first."""
+        if self.count <= self.size:
+            return range(self.count)
+        return [(self._next + n) % self.size for n in range(self.size)]
+
+    def records(self):
+        """Return a list of RECORD, oldest first."""
+        names = self.names
+        return [
+            RECORD(
+                self.timestamps[index],
+                names[self.states[index]],
+                names[self.events[index]],
+                bool(self.flags[index] & IS_DEFAULT),
+                bool(self.flags[index] & IS_INTERNAL),
+            )
+            for index in self._order()
+        ]
+
+    def clear(self):
+        """Discard all records."""
+        self._next = 0
+        self.count = 0
+
+    def write(self, output):
+        """Write the records, oldest first, in binary form.
+
+            Arguments:
+            output -- filename or binary file object
+
+            Format: header (magic, record count, names size), newline
+            separated utf-8 names, then the int64 timestamps, uint32 state
+            ids, uint32 event ids and uint8 flags arrays (native byte order).
+        """
+        if isinstance(output, str):
+            with open(output, 'wb') as out:
+                return self.write(out)
+        order = self._order()
+        names = '\n'.join(self.names).encode()
+        output.write(HEADER.pack(MAGIC, len(order), len(names)))
+        output.write(names)
+        for values in (self.timestamps, self.states, self.events, self.flags):
+            output.write(array(values.typecode, (
+                values[index] for index in order)).tobytes())
+        return None
+
+    @staticmethod
+    def read(source):
+        """Return a list of RECORD from data written by write.
+
+            Arguments:
+            source -- filename or binary file object
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as data:
+                return TraceRing.read(data)
+        magic, count, size = HEADER.unpack(source.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('not a trace file')
+        names = source.read(size).decode().split('\n')
+        values = []
+        for typecode in 'qIIB':
+            column = array(typecode)
+            column.frombytes(source.read(column.itemsize * count))
+            values.append(column)
+        return [
+            RECORD(
+                timestamp, names[state], names[event],
+                bool(flags & IS_DEFAULT), bool(flags & IS_INTERNAL))
+            for timestamp, state, event, flags in zip(*values)
+        ]
+
+    def attach(self, fsm, on_exception=None):
+        """Set this ring as an fsm's tracer.
+
+            Arguments:
+            fsm -- fsm.FSM.FSM
+
+            Keyword Arguments:
+            on_exception -- callable, called with (ring, exception) when an
+                            action routine raises, before the fsm's own
+                            EXCEPTION handling (if any) runs
+        """
+        fsm.trace = self
+        if on_exception is None:
+            return
+        handler = fsm.exception
+
+        def exception(e):
+            on_exception(self, e)
+            if handler is None:
+                raise e
+            return handler(e)
+
+        fsm.exception = exception
@@ -0,0 +1,218 @@
+"""Vectorized stepping of many machine instances with numpy.
+
+    A Vector turns a parsed fsm description into a numpy transition matrix
+    (state x event -> next state, with DEFAULT events merged into every
+    row). An array of instance states is advanced against an array of
+    events in one call. Transitions which have action, exit or enter
+    routines are not run inline; they are returned grouped by
+    (state, event) so that each group can be handled at once. Because the
+    whole array is advanced first, an instance's routines run after it is
+    already in its next state, and an exception from a routine cannot stop
+    the transition (see Vector.apply).
+
+    TIMEOUT and DEFER are not supported; a Vector is not built from a
+    description that uses them.
+
+    Requires numpy.
+
+    MIT License
+    https://github.com/robertchase/fsm/blob/master/LICENSE
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from fsm.actions import resolve, supported
+from fsm.FSM import DEFAULT
+
+
+NO_EVENT = -1
+
+# result of Vector.step
+#   states -- array of instance states (updated in place)
+#   undefined -- boolean array, True where the event was not defined
+#   callbacks -- list of CALLBACK
+STEP = namedtuple('STEP', 'states undefined callbacks')
+
+# instances which made the same transition and need routines run
+#   state -- id of the state the instances were in
+#   event -- id of the event
+#   indexes -- array of instance indexes
+CALLBACK = namedtuple('CALLBACK', 'state event indexes')
+
+
+class Vector(object):
+    """Transition matrix for a parsed fsm description
+
+        Arguments:
+        parser -- fsm.parser.Parser returned from Parser.parse
+
+        Raises:
+        fsm.actions.Unsupported -- if a state has a TIMEOUT or DEFER
+
+        Attributes:
+        state_names -- list of state names, indexed by state id
+        state_ids -- dict of state id by name
+        event_names -- list of event names, indexed by event id
+        event_ids -- dict of event id by name
+        next -- int32 array [state, event] of next state id, -1 if undefined;
+                an extra last column (id len(event_names)) stands for any
+                unknown event and is always undefined
+        callback -- bool array [state, event], True if routines must be run
+        routines -- dict of routine names by (state id, event id), for the
+                    transitions which have any
+        exception -- EXCEPTION handler (callable) from the description, or
+                     None
+    """
+
+    def __init__(self, parser):
+        supported('Vector', parser.states.values())
+        states = [s for n, s in parser.states.items() if n != DEFAULT]
+        default = parser.states[DEFAULT].events \
+            if DEFAULT in parser.states else {}
+
+        self.state_names = [state.name for state in states]
+        self.state_ids = {n: i for i, n in enumerate(self.state_names)}
+
+        names = set(default)
+        for state in states:
+            names.update(state.events)
+        self.event_names = sorted(names)
+        self.event_ids = {n: i for i, n in enumerate(self.event_names)}
+
+        self.first_state = self.state_ids.get(parser.first_state, 0)
+        self.exception = resolve(parser.exception)
+        self.next = np.full(
+            (len(states), len(self.event_names) + 1), -1, dtype=np.int32)
+        self.callback = np.zeros(self.next.shape, dtype=bool)
+        self.routines = {}
+
+        for sid, state in enumerate(states):
+            events = dict(default)
+            events.update(state.events)
+            for name, event in events.items():
+                eid = self.event_ids[name]
+                routines = list(event.actions)
+                if event.next_state:
+                    target = parser.states[event.next_state]
+                    self.next[sid, eid] = self.state_ids[target.name]
+                    if state.exit:
+                        routines.append(state.exit)
+                    if target.enter:
+                        routines.append(target.enter)
+                else:
+                    self.next[sid, eid] = sid
+                if routines:
+                    self.callback[sid, eid] = True
+                    self.routines[(sid, eid)] = routines
+
+    def states(self, count, state=None):
+        """Return an array of count instance states.
+
+            Keyword Arguments:
+            state -- initial state name (default: the first state)
+        """
+        sid = self.first_state if state is None else self.state_ids[state]
+        return np.full(count, sid, dtype=np.int32)
+
+    def event_id(self, name):
+        """Return the id of an event name; unknown names are undefined."""
+        return self.event_ids.get(name, len(self.event_names))
+
+    def events(self, names):
+        """Return an array of event ids from a sequence of event names.
+
+            A None name is converted to NO_EVENT.
+        """
+        return np.array([
+            NO_EVENT if name is None else self.event_id(name)
+            for name in names
+        ], dtype=np.int32)
+
+    def step(self, states, events):
+        """Advance each instance state by one event.
+
+            Arguments:
+            states -- int array of instance states, updated in place
+            events -- int array of event ids, one per instance; instances
+                      with an event of NO_EVENT are left alone
+
+            Returns:
+            STEP
+        """
+        events = np.asarray(events)
+        valid = events != NO_EVENT
+        event_ids = np.where(valid, events, 0)
+        next_states = self.next[states, event_ids]
+
+        undefined = valid & (next_states < 0)
+        moved = valid & (next_states >= 0)
+
+        # --- group instances that need routines run by (state, event)
+        indexes = np.nonzero(moved & self.callback[states, event_ids])[0]
+        callbacks = []
+        if len(indexes):
+            width = self.next.shape[1]
+            keys = states[indexes].astype(np.int64) * width + \
+                event_ids[indexes]
+            order = np.argsort(keys, kind='stable')
+            keys, starts = np.unique(keys[order], return_index=True)
+            groups = np.split(indexes[order], starts[1:])
+            callbacks = [
+                CALLBACK(int(key) // width, int(key) % width, group)
+                for key, group in zip(keys, groups)
+            ]
+
+        states[moved] = next_states[moved]
+        return STEP(states, undefined, callbacks)
+
+    def apply(self, step, actions, contexts=None):
+        """Run the routines for each CALLBACK group of a STEP.
+
+            The state of each instance has already been advanced, before
+            any routine runs. Any event returned by the last routine is
+            collected so that it can be passed to the next call to step.
+
+            If a routine raises, the instance's remaining routines are
+            skipped and the exception is passed to the EXCEPTION handler
+            (with the context first, if contexts are given); an event it
+            returns is collected in the same way. Without a handler, the
+            routines of every other instance are still run, and the first
+            exception is raised at the end.
+
+            Arguments:
+            step -- STEP returned by step
+            actions -- dict of routine callables by name
+
+            Keyword Arguments:
+            contexts -- sequence of per-instance context objects; if given,
+                        each routine is called with its instance's context
+
+            Returns:
+            int array of next event ids (NO_EVENT if none)
+        """
+        events = np.full(len(step.states), NO_EVENT, dtype=np.int32)
+        exception = self.exception
+        error = None
+        for callback in step.callbacks:
+            routines = [
+                actions[name]
+                for name in self.routines[(callback.state, callback.event)]
+            ]
+            for index in callback.indexes.tolist():
+                args = () if contexts is None else (contexts[index],)
+                result = None
+                try:
+                    for routine in routines:
+                        result = routine(*args)
+                except Exception as e:  # pylint: disable=broad-except
+                    if not exception:
+                        if error is None:
+                            error = e
+                        continue
+                    result = exception(*(args + (e,)))
+                if result:
+                    events[index] = self.event_id(result)
+        if error is not None:
+            raise error
+        return events
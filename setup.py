@@ -14,4 +14,7 @@ Documentation
     author='Bob Chase',
     url='https://github.com/robertchase/fsm',
     license='MIT',
+    extras_require={
+        'vector': ['numpy'],
+    },
 )
@@ -187,3 +187,32 @@ def test_handler_duplicate_name(context):
     actions.act_handler(context)
     with pytest.raises(actions.DuplicateName):
         actions.act_handler(context)
+
+
+def test_handler_import_failed(context):
+    context.line = 'one fsm.actions.nope'
+    with pytest.raises(actions.ImportFailed) as error:
+        actions.act_handler(context)
+    assert 'line=10' in str(error.value)
+
+
+def test_handler_lazy(context):
+    context.lazy = True
+    context.line = 'one fsm.actions.nope'
+    actions.act_handler(context)
+    handler = context.handlers['one']
+    assert isinstance(handler, actions.Lazy)
+    with pytest.raises(actions.ImportFailed) as error:
+        handler()
+    assert 'line=10' in str(error.value)
+
+
+def test_resolve(context):
+    context.lazy = True
+    context.line = 'one fsm.actions.act_context'
+    actions.act_handler(context)
+    context.line = 'fsm.actions.Context'
+    actions.act_context(context)
+    context.resolve()
+    assert context.handlers['one'] is actions.act_context
+    assert context.context is actions.Context
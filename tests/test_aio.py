@@ -0,0 +1,119 @@
+import asyncio
+
+import fsm.FSM as FSM
+from fsm.parser import Parser
+
+
+class Door:
+    def __init__(self):
+        self.log = []
+        self.error = None
+
+
+async def open_door(door, *args):
+    await asyncio.sleep(0)
+    door.log.append(('open',) + args)
+    return 'opened'
+
+
+def close_door(door):
+    door.log.append('close')
+
+
+async def jam(door):
+    raise Exception('jammed')
+
+
+async def on_exception(door, e):
+    door.error = e
+    return 'error'
+
+
+DESCRIPTION = [
+    'STATE closed',
+    '  EVENT open',
+    '    ACTION open_door',
+    '  EVENT opened open',
+    '  EVENT jam',
+    '    ACTION jam',
+    '  EVENT error broken',
+    'STATE open',
+    '  EVENT close closed',
+    '    ACTION close_door',
+    'STATE broken',
+    'CONTEXT tests.test_aio.Door',
+    'HANDLER open_door tests.test_aio.open_door',
+    'HANDLER close_door tests.test_aio.close_door',
+    'HANDLER jam tests.test_aio.jam',
+    'EXCEPTION tests.test_aio.on_exception',
+]
+
+
+def test_handle():
+    fsm = Parser.load_async(DESCRIPTION)
+
+    async def run():
+        assert await fsm.handle('open', 1)
+        assert fsm.state == 'open'
+        assert await fsm.handle('close')
+        assert not await fsm.handle('huh')
+
+    asyncio.run(run())
+    assert fsm.state == 'closed'
+    assert fsm.context.log == [('open', 1), 'close']
+
+
+def test_exception():
+    fsm = Parser.load_async(DESCRIPTION)
+    asyncio.run(fsm.handle('jam'))
+    assert fsm.state == 'broken'
+    assert str(fsm.context.error) == 'jammed'
+
+
+def test_handle_many():
+    fsm = Parser.load_async(DESCRIPTION)
+    result = asyncio.run(fsm.handle_many(['open', 'huh', 'close'], FSM.SKIP))
+    assert result == (2, 1, None)
+    assert fsm.state == 'closed'
+
+
+def test_concurrent():
+    machines = [Parser.load_async(DESCRIPTION) for _ in range(10)]
+
+    async def run():
+        return await asyncio.gather(*(m.handle('open') for m in machines))
+
+    assert all(asyncio.run(run()))
+    assert all(m.state == 'open' for m in machines)
+
+
+def test_sync_actions():
+    calls = []
+    fsm = Parser.parse([
+        'STATE a',
+        '  EVENT go b',
+        '    ACTION one',
+        'STATE b',
+    ]).build_async(one=lambda: calls.append('one'))
+    assert asyncio.run(fsm.handle('go'))
+    assert fsm.state == 'b'
+    assert calls == ['one']
+
+
+def test_hooks():
+    seen = []
+    fsm = Parser.load_async(DESCRIPTION)
+    fsm.trace = lambda *a: seen.append(('trace',) + a)
+    fsm.undefined = lambda *a: seen.append(('undefined',) + a)
+
+    async def run():
+        await fsm.handle('close')
+        await fsm.handle('open')
+
+    asyncio.run(run())
+    assert seen == [
+        ('trace', 'closed', 'close', False, False),
+        ('undefined', 'closed', 'close', False, False),
+        ('trace', 'closed', 'open', False, False),
+        ('trace', 'closed', 'opened', False, True),
+    ]
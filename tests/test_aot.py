@@ -0,0 +1,79 @@
+import sys
+
+import pytest
+
+import fsm.aot as aot
+
+
+class Light:
+    def __init__(self, name='light'):
+        self.name = name
+        self.is_on = False
+
+
+def turn_on(light):
+    light.is_on = True
+
+
+def turn_off(light):
+    light.is_on = False
+
+
+DESCRIPTION = '''
+STATE off
+  EVENT press on
+    ACTION turn_on
+STATE on
+  EVENT press off
+    ACTION turn_off
+CONTEXT tests.test_aot.Light
+HANDLER turn_on tests.test_aot.turn_on
+HANDLER turn_off tests.test_aot.turn_off
+'''
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    pkg = tmp_path / 'aotpkg'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'light.fsm').write_text(DESCRIPTION)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield pkg
+    for name in list(sys.modules):
+        if name.startswith('aotpkg'):
+            del sys.modules[name]
+
+
+def test_module_name():
+    assert aot.module_name('pkg.light.fsm') == 'pkg.light_fsm'
+
+
+def test_fallback(package):
+    assert aot.prebuilt('aotpkg.light.fsm') is None
+    fsm = aot.load('aotpkg.light.fsm', 'hall')
+    assert fsm.context.name == 'hall'
+    assert fsm.handle('press')
+    assert fsm.context.is_on
+
+
+def test_prebuilt(package):
+    aot.main(['aotpkg.light.fsm'])
+    source = (package / 'light_fsm.py').read_text()
+    assert 'import fsm' not in source
+    assert 'from fsm' not in source
+    module = aot.prebuilt('aotpkg.light.fsm')
+    assert module is not None
+    fsm = aot.load('aotpkg.light.fsm', 'den')
+    assert type(fsm) is module.machine()
+    assert fsm.context.name == 'den'
+    fsm.handle('press')
+    fsm.handle('press')
+    assert fsm.state == 'off'
+    assert not fsm.context.is_on
+
+
+def test_stale(package):
+    aot.main(['aotpkg.light.fsm'])
+    (package / 'light.fsm').write_text(DESCRIPTION + 'STATE extra\n')
+    assert aot.prebuilt('aotpkg.light.fsm') is None
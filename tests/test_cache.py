@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import fsm.actions as actions
+from fsm.cache import Cache
+from fsm.parser import Parser
+
+
+def turn_on():
+    pass
+
+
+DESCRIPTION = '''
+STATE off
+  EVENT press on
+    ACTION turn_on
+STATE on
+HANDLER turn_on tests.test_cache.turn_on
+'''
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = Cache()
+    monkeypatch.setattr(Parser, 'cache', cache)
+    return cache
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'light.fsm'
+    path.write_text(DESCRIPTION)
+    return str(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    count = []
+    parse = Parser._parse.__func__
+
+    def counted(cls, lines, lazy=False):
+        count.append(1)
+        return parse(cls, lines, lazy)
+
+    monkeypatch.setattr(Parser, '_parse', classmethod(counted))
+    return count
+
+
+def test_memory(cache, path, parses):
+    one = Parser.load(path)
+    two = Parser.load(path)
+    assert len(parses) == 1
+    assert one.handle('press')
+    assert two.handle('press')
+    assert one.states is not two.states
+
+
+def test_disk(cache, path, parses):
+    Parser.parse(path)
+    assert os.path.exists(cache.path(path))
+    cache.clear()
+    parser = Parser.parse(path)
+    assert len(parses) == 1
+    assert parser.first_state == 'off'
+    assert parser.handlers['turn_on'].__name__ == 'turn_on'
+
+
+def test_changed(cache, path, parses):
+    Parser.parse(path)
+    with open(path, 'w') as output:
+        output.write('STATE extra\n' + DESCRIPTION)
+    parser = Parser.parse(path)
+    assert len(parses) == 2
+    assert 'extra' in parser.states
+
+
+def test_memory_only(monkeypatch, path, parses):
+    cache = Cache(disk=False)
+    monkeypatch.setattr(Parser, 'cache', cache)
+    Parser.parse(path)
+    Parser.parse(path)
+    assert len(parses) == 1
+    assert not os.path.exists(cache.path(path))
+
+
+def test_errors_not_cached(cache, tmp_path):
+    path = tmp_path / 'bad.fsm'
+    path.write_text('STATE one two\n')
+    for _ in range(2):
+        with pytest.raises(actions.ExtraToken):
+            Parser.parse(str(path))
@@ -0,0 +1,126 @@
+import pytest
+
+from fsm.actions import Unsupported
+import fsm.compiler as compiler
+from fsm.parser import Parser
+
+
+DESCRIPTION = [
+    'STATE off',
+    '  EXIT leave',
+    '  EVENT press on',
+    '    ACTION turn_on',
+    '    ACTION count',
+    'STATE on',
+    '  ENTER check',
+    '  EVENT ok',
+    '  EVENT press off',
+    '    ACTION turn_off',
+    'DEFAULT reset off',
+]
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def actions(calls):
+    def record(name, result=None):
+        def action(*args, **kwargs):
+            calls.append((name, args, kwargs))
+            return result
+        return action
+    return dict(
+        leave=record('leave'),
+        turn_on=record('turn_on'),
+        count=record('count'),
+        check=record('check', 'ok'),
+        turn_off=record('turn_off'),
+    )
+
+
+def run(fsm, events):
+    return [(fsm.handle(event, 1, x=2), fsm.state) for event in events]
+
+
+def test_same_as_build(actions, calls):
+    events = ['press', 'huh', 'press', 'reset', 'ok', 'press', 'reset']
+    expected = run(Parser.parse(DESCRIPTION).build(**actions), events)
+    expected_calls = list(calls)
+    del calls[:]
+
+    machine = Parser.parse(DESCRIPTION).specialize(**actions)
+    assert run(machine.instance(), events) == expected
+    assert calls == expected_calls
+
+
+def test_trace(actions):
+    trace = []
+    fsm = Parser.parse(DESCRIPTION).specialize(**actions).instance()
+    fsm.trace = lambda *a: trace.append(a)
+    fsm.handle('press')
+    fsm.handle('reset')
+    assert trace == [
+        ('off', 'press', False, False),
+        ('on', 'ok', False, True),
+        ('on', 'reset', True, False),
+    ]
+
+
+def test_state_change(actions):
+    changes = []
+    fsm = Parser.parse(DESCRIPTION).specialize(**actions).instance()
+    fsm.on_state_change = lambda *a: changes.append(a)
+    fsm.handle('press')
+    fsm.state = 'off'
+    assert fsm.state == 'off'
+    assert changes == [('on', 'off')]
+
+
+class Context:
+    def __init__(self):
+        self.error = None
+
+
+def boom(context):
+    raise Exception('boom')
+
+
+def on_exception(context, e):
+    context.error = e
+    return 'error'
+
+
+def test_context_and_exception():
+    fsm = Parser.parse([
+        'STATE a',
+        '  EVENT go',
+        '    ACTION boom',
+        '  EVENT error b',
+        'STATE b',
+        'CONTEXT tests.test_compiler.Context',
+        'HANDLER boom tests.test_compiler.boom',
+        'EXCEPTION tests.test_compiler.on_exception',
+    ]).specialize().instance()
+    assert fsm.handle('go')
+    assert fsm.state == 'b'
+    assert str(fsm.context.error) == 'boom'
+
+
+def test_generate_source():
+    source = compiler.generate(Parser.parse(DESCRIPTION))
+    assert 'def create(actions' in source
+    assert '(default)' in source
+    compile(source, 'test', 'exec')
+
+
+@pytest.mark.parametrize('line, directive', [
+    ('  TIMEOUT 5 press', 'TIMEOUT'),
+    ('  DEFER press', 'DEFER'),
+])
+def test_unsupported(line, directive):
+    parser = Parser.parse(['STATE off', line, '  EVENT press'])
+    with pytest.raises(Unsupported, match=directive):
+        parser.specialize()
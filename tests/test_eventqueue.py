@@ -0,0 +1,142 @@
+import pytest
+
+from fsm.eventqueue import DROP_OLDEST, EventQueue
+from fsm.parser import Parser
+from fsm.timer import TimingWheel
+
+
+DESCRIPTION = [
+    'STATE connecting',
+    '  DEFER send',
+    '  EVENT connected open',
+    'STATE open',
+    '  EVENT send',
+    '    ACTION send',
+    '  EVENT close closed',
+    'STATE closed',
+]
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def fsm(sent):
+    return Parser.parse(DESCRIPTION).build(send=sent.append)
+
+
+def test_run(fsm, sent):
+    queue = EventQueue(fsm)
+    queue.post('send', 1)
+    queue.post('send', 2)
+    assert queue.run() == 0
+    assert queue.deferred == 2
+    assert len(queue) == 2
+
+    queue.post('connected')
+    queue.post('send', 3)
+    assert queue.run() == 4
+    assert sent == [1, 2, 3]
+    assert len(queue) == 0
+    assert queue.high_water == 4
+
+
+def test_undefined(fsm):
+    queue = EventQueue(fsm)
+    queue.post('connected')
+    queue.post('connected')
+    assert queue.run() == 1
+    assert queue.undefined == 1
+
+
+def test_reject(fsm):
+    queue = EventQueue(fsm, maxsize=2)
+    assert queue.post('a')
+    assert queue.post('b')
+    assert not queue.post('c')
+    assert queue.dropped == 1
+    assert len(queue) == 2
+
+
+def test_drop_oldest(fsm, sent):
+    fsm.state = 'open'
+    queue = EventQueue(fsm, maxsize=2, overflow=DROP_OLDEST)
+    for value in range(4):
+        queue.post('send', value)
+    assert queue.dropped == 2
+    queue.run()
+    assert sent == [2, 3]
+
+
+def test_priority(fsm, sent):
+    fsm.state = 'open'
+    queue = EventQueue(
+        fsm, maxsize=2, overflow=DROP_OLDEST, priority={'close': 1})
+    queue.post('send', 1)
+    queue.post('close')
+    queue.post('send', 2)  # drops send 1, not close
+    assert queue.run() == 1
+    assert fsm.state == 'closed'
+    assert queue.undefined == 1
+    assert sent == []
+
+
+def test_post_from_action(sent):
+    queue = None
+
+    def send(value):
+        sent.append(value)
+        if value < 3:
+            queue.post('send', value + 1)
+
+    fsm = Parser.parse(DESCRIPTION).build(send=send)
+    fsm.state = 'open'
+    queue = EventQueue(fsm)
+    queue.post('send', 1)
+    assert queue.run() == 3
+    assert sent == [1, 2, 3]
+
+
+def test_nested_defer():
+    parser = Parser.parse([
+        'STATE busy',
+        '  DEFER work',
+        'STATE busier',
+        '  PARENT busy',
+    ])
+    assert parser.states['busier'].defer == ['work']
+
+
+def test_state_changed_outside(sent):
+    now = [0.0]
+    wheel = TimingWheel(tick=1, size=8, clock=lambda: now[0])
+    parser = Parser.parse(DESCRIPTION)
+    parser.states['connecting'].timeout = (1, 'connected')
+    fsm = parser.build(send=sent.append)
+    fsm.timers = wheel
+    fsm.state = 'connecting'
+    queue = EventQueue(fsm)
+    queue.post('send', 1)
+    assert queue.run() == 0
+    assert queue.deferred == 1
+
+    now[0] = 1
+    wheel.advance()  # TIMEOUT moves the machine, not the queue
+    assert fsm.state == 'open'
+    assert queue.run() == 1
+    assert sent == [1]
+    assert queue.deferred == 0
+    assert len(queue) == 0
+
+
+def test_state_set_outside(fsm, sent):
+    queue = EventQueue(fsm)
+    queue.post('send', 1)
+    queue.post('close')
+    assert queue.run() == 0  # close is undefined in connecting
+    assert queue.deferred == 1
+    fsm.state = 'open'
+    assert queue.run() == 1
+    assert sent == [1]
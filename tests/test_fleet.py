@@ -0,0 +1,58 @@
+from fsm.fleet import Fleet
+from fsm.parser import Parser
+
+
+class Account:
+    def __init__(self, limit):
+        self.limit = limit
+        self.total = 0
+
+
+def deposit(account, amount):
+    account.total += amount
+    if account.total > account.limit:
+        return 'full'
+
+
+def fail(account):
+    raise Exception('closed')
+
+
+DESCRIPTION = [
+    'STATE open',
+    '  EVENT deposit',
+    '    ACTION deposit',
+    '  EVENT full full',
+    'STATE full',
+    '  EVENT deposit',
+    '    ACTION fail',
+    'CONTEXT tests.test_fleet.Account',
+    'HANDLER deposit tests.test_fleet.deposit',
+    'HANDLER fail tests.test_fleet.fail',
+]
+
+
+def test_fleet():
+    with Fleet(DESCRIPTION, 10, workers=2, batch=7) as fleet:
+        assert fleet.workers == 2
+        for key in range(20):
+            for _ in range(key):
+                fleet.post(key, 'deposit', 1)
+        fleet.post(3, 'huh')
+        states = fleet.snapshot()
+        result = fleet.collect()
+
+    assert len(states) == 19
+    assert states[3] == 'open'
+    assert states[11] == 'full'
+    assert result.undefined == [(3, 'huh')]
+    assert len(result.errors) == sum(key - 11 for key in range(12, 20))
+    assert result.handled == sum(range(20)) - len(result.errors)
+
+
+def test_compile_twice():
+    parser = Parser.parse(DESCRIPTION + ['EXCEPTION tests.test_fleet.fail'])
+    one = parser.compile(1)
+    two = parser.compile(2)
+    assert one.context is not two.context
+    assert parser.exception is two.exception.func
@@ -1,3 +1,6 @@
+import pytest
+
+import fsm.FSM as FSM
 from fsm.parser import Parser
 
 
@@ -101,3 +104,95 @@ def test_default():
     fsm.handle('press')
     assert fsm.context.is_on
     assert fsm.context.error
+
+
+def toggle():
+    return Parser.load([
+        'STATE off',
+        '  EVENT press on',
+        '    ACTION turn_on',
+        'STATE on',
+        '  EVENT press off',
+        '    ACTION turn_off',
+        'CONTEXT tests.test_machine.LightBulb',
+        'HANDLER turn_on tests.test_machine.turn_on',
+        'HANDLER turn_off tests.test_machine.turn_off',
+    ])
+
+
+def test_handle_many():
+    fsm = toggle()
+    result = fsm.handle_many(['press', 'press', 'huh', 'press'])
+    assert result == (2, 2, None)
+    assert fsm.state == 'off'
+
+    result = fsm.handle_many(['press', 'huh', 'press', 'what'], FSM.SKIP)
+    assert result == (2, 1, None)
+
+    result = fsm.handle_many(['press', 'huh', 'press', 'what'], FSM.COLLECT)
+    assert result.count == 2
+    assert result.undefined == [1, 3]
+
+    with pytest.raises(ValueError):
+        fsm.handle_many([], 'huh')
+
+
+def count(bulb, amount, scale=1):
+    bulb.count = getattr(bulb, 'count', 0) + amount * scale
+
+
+def test_handle_payloads():
+    fsm = Parser.load([
+        'STATE one',
+        '  EVENT add',
+        '    ACTION count',
+        'CONTEXT tests.test_machine.LightBulb',
+        'HANDLER count tests.test_machine.count',
+    ])
+    result = fsm.handle_payloads([
+        ('add', (1,), {}),
+        ('add', (2,), {'scale': 10}),
+    ])
+    assert result == (2, None, None)
+    assert fsm.context.count == 21
+
+
+def test_payload_first_routine_only():
+    calls = []
+
+    def record(name):
+        return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+    fsm = Parser.parse([
+        'STATE one',
+        '  EXIT leave',
+        '  EVENT go two',
+        '    ACTION first',
+        '    ACTION second',
+        'STATE two',
+        '  ENTER arrive',
+    ]).build(
+        first=record('first'), second=record('second'),
+        leave=record('leave'), arrive=record('arrive'),
+    )
+    fsm.state = 'one'
+    assert fsm.handle('go', 1, key=2)
+    assert calls == [
+        ('first', (1,), {'key': 2}),
+        ('second', (), {}),
+        ('leave', (), {}),
+        ('arrive', (), {}),
+    ]
+
+
+def test_dispatch():
+    fsm = Parser.parse([
+        'STATE one',
+        '  EVENT go two',
+        '    ACTION go',
+        'STATE two',
+    ]).build(go=lambda: None)
+    fsm.state = 'one'
+    assert fsm.dispatch('go')
+    assert fsm.state == 'two'
+    assert not fsm.dispatch('go')
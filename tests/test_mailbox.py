@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from fsm.mailbox import Mailbox
+from fsm.parser import Parser
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+        self.order = []
+
+
+def add(counter, value=None):
+    counter.count += 1
+    if value is not None:
+        counter.order.append(value)
+
+
+def counter():
+    return Parser.load([
+        'STATE one',
+        '  EVENT add',
+        '    ACTION add',
+        'CONTEXT tests.test_mailbox.Counter',
+        'HANDLER add tests.test_mailbox.add',
+    ])
+
+
+def test_post():
+    fsm = counter()
+    box = Mailbox(fsm)
+    box.post('add', 1)
+    box.post('add', value=2)
+    assert box.pending == 0
+    assert fsm.context.order == [1, 2]
+
+
+def test_reentrant():
+    fsm = counter()
+    box = Mailbox(fsm)
+
+    def again(counter, value=None):
+        add(counter, value)
+        if value < 3:
+            box.post('add', value + 1)
+            assert counter.order[-1] == value  # not handled yet
+
+    fsm.states['one'].events['add'].actions = [
+        lambda *a, **k: again(fsm.context, *a, **k)]
+    box.post('add', 1)
+    assert fsm.context.order == [1, 2, 3]
+
+
+def test_threads():
+    fsm = counter()
+    box = Mailbox(fsm)
+
+    def post(thread):
+        for num in range(1000):
+            box.post('add', (thread, num))
+
+    threads = [threading.Thread(target=post, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fsm.context.count == 8000
+    for num in range(8):
+        order = [v for t, v in fsm.context.order if t == num]
+        assert order == list(range(1000))
+
+
+def test_executor():
+    fsm = counter()
+    with ThreadPoolExecutor(4) as executor:
+        box = Mailbox(fsm, executor)
+        for num in range(100):
+            box.post('add', num)
+    assert fsm.context.order == list(range(100))
+
+
+def test_executor_error():
+    errors = []
+    fsm = counter()
+
+    def add(value):
+        if value == 'bad':
+            raise ValueError(value)
+        fsm.context.order.append(value)
+        if value == 1:  # queued behind the running drain
+            box.post('add', 'bad')
+            box.post('add', 2)
+
+    fsm.states['one'].events['add'].actions = [add]
+    with ThreadPoolExecutor(1) as executor:
+        box = Mailbox(fsm, executor, on_error=errors.append)
+        box.post('add', 1)
+    assert [str(e) for e in errors] == ['bad']
+    assert str(box.future.exception()) == 'bad'
+    assert fsm.context.order == [1, 2]
+    assert box.pending == 0
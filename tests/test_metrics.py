@@ -0,0 +1,76 @@
+import json
+import pickle
+
+import pytest
+
+from fsm.metrics import Metrics
+from fsm.parser import Parser
+
+
+def check():
+    return 'ok'
+
+
+def turn_on():
+    pass
+
+
+def boom():
+    raise Exception('boom')
+
+
+def machine():
+    return Parser.parse([
+        'STATE off',
+        '  EVENT press on',
+        '    ACTION turn_on',
+        'STATE on',
+        '  ENTER check',
+        '  EVENT ok',
+        '  EVENT press off',
+        '  EVENT boom',
+        '    ACTION boom',
+        'DEFAULT reset off',
+    ]).build(check=check, turn_on=turn_on, boom=boom)
+
+
+def test_counts():
+    metrics = Metrics()
+    one, two = machine(), machine()
+    metrics.attach(one)
+    metrics.attach(two)
+
+    one.handle('press')
+    one.handle('reset')
+    two.handle('huh')
+
+    assert metrics.events[('off', 'press')] == 1
+    assert metrics.events[('on', 'ok')] == 1
+    assert metrics.defaults == {('on', 'reset'): 1}
+    assert metrics.undefined == {('off', 'huh'): 1}
+    assert metrics.chains == {0: 2, 1: 1}
+    assert metrics.latency['action:turn_on'].count == 1
+    assert metrics.latency['enter:check'].count == 1
+
+
+def test_latency_on_exception():
+    metrics = Metrics()
+    fsm = machine()
+    metrics.attach(fsm)
+    fsm.handle('press')
+    with pytest.raises(Exception):
+        fsm.handle('boom')
+    assert metrics.latency['action:boom'].count == 1
+    assert metrics.chains[0] == 1
+
+
+def test_merge():
+    one, two = Metrics(), Metrics()
+    for metrics in (one, two):
+        fsm = machine()
+        metrics.attach(fsm)
+        fsm.handle('press')
+    one.merge(pickle.loads(pickle.dumps(two)))
+    assert one.events[('off', 'press')] == 2
+    assert one.latency['action:turn_on'].count == 2
+    assert json.loads(json.dumps(one.as_dict()))['chains'] == {'1': 2}
@@ -0,0 +1,99 @@
+import pytest
+
+from fsm.parser import Parser
+
+
+def step():
+    return None
+
+
+@pytest.fixture
+def parser():
+    return Parser.parse([
+        'STATE idle',
+        '  EVENT go one',
+        '  EVENT skip two',
+        'STATE one',
+        '  ENTER step',
+        '  EVENT back idle',
+        '  EVENT again one',
+        'STATE two',
+        '  ENTER step',
+        '  EVENT back idle',
+        '  EVENT again two',
+        'STATE three',
+        '  ENTER step',
+        '  EVENT back idle',
+        '  EVENT again one',
+        'STATE orphan',
+        '  EVENT go idle',
+        'DEFAULT reset idle',
+    ])
+
+
+def test_minimize(parser):
+    report = parser.minimize()
+    assert report.unreachable == ['three', 'orphan']
+    assert report.merged == {'two': 'one'}
+    assert sorted(parser.states) == ['__default__', 'idle', 'one']
+    assert parser.states['idle'].events['skip'].next_state == 'one'
+    assert parser.states['one'].events['again'].next_state == 'one'
+
+
+def test_behavior(parser):
+    parser.minimize()
+    fsm = parser.build(step=step)
+    fsm.state = 'idle'
+    assert fsm.handle('skip')
+    assert fsm.state == 'one'
+    assert fsm.handle('again')
+    assert fsm.handle('reset')
+    assert fsm.state == 'idle'
+
+
+def test_default_target():
+    parser = Parser.parse([
+        'STATE idle',
+        'STATE error',
+        'DEFAULT fail error',
+    ])
+    report = parser.minimize()
+    assert report.unreachable == []
+    assert report.merged == {'error': 'idle'}  # no events, no routines
+    assert parser.states['__default__'].events['fail'].next_state == 'idle'
+
+
+def test_different_actions():
+    parser = Parser.parse([
+        'STATE a',
+        '  EVENT x b',
+        'STATE b',
+        '  EVENT x c',
+        '    ACTION one',
+        'STATE c',
+        '  EVENT x a',
+        '    ACTION two',
+    ])
+    assert parser.minimize().merged == {}
+
+
+def test_refinement():
+    parser = Parser.parse([
+        'STATE a',
+        '  EVENT x b',
+        'STATE b',
+        '  EVENT x c',
+        'STATE c',
+        '  EVENT x d',
+        'STATE d',
+    ])
+    # d has no events, so c differs from b, and b from a
+    assert parser.minimize().merged == {}
+
+    parser = Parser.parse([
+        'STATE a',
+        '  EVENT x b',
+        'STATE b',
+        '  EVENT x a',
+    ])
+    assert parser.minimize().merged == {'b': 'a'}
@@ -0,0 +1,112 @@
+import pytest
+
+import fsm.actions as actions
+from fsm.parser import Parser
+
+
+DESCRIPTION = [
+    'STATE idle',
+    '  EXIT leave_idle',
+    '  EVENT dial handshake',
+    'STATE connected',
+    '  ENTER enter_connected',
+    '  EXIT exit_connected',
+    '  EVENT drop idle',
+    '  EVENT ping',
+    '    ACTION pong',
+    'STATE handshake',
+    '  PARENT connected',
+    '  ENTER enter_handshake',
+    '  EXIT exit_handshake',
+    '  EVENT ready open',
+    'STATE open',
+    '  PARENT connected',
+    '  ENTER enter_open',
+    '  EVENT ping',
+    '    ACTION pong_open',
+    '  EVENT again open',
+    'DEFAULT reset idle',
+]
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def routines(calls):
+    names = Parser.parse(DESCRIPTION).actions
+    return {
+        name: (lambda n: lambda: calls.append(n))(name) for name in names
+    }
+
+
+@pytest.fixture(params=['build', 'template', 'specialize'])
+def machine(request, routines):
+    parser = Parser.parse(DESCRIPTION)
+    if request.param == 'build':
+        return parser.build(**routines)
+    if request.param == 'template':
+        return parser.template(**routines).instance()
+    return parser.specialize(**routines).instance()
+
+
+def run(machine, calls, state, event):
+    machine.state = state
+    del calls[:]
+    assert machine.handle(event)
+    return list(calls)
+
+
+def test_enter_chain(machine, calls):
+    assert run(machine, calls, 'idle', 'dial') == [
+        'leave_idle', 'enter_connected', 'enter_handshake']
+    assert machine.state == 'handshake'
+
+
+def test_sibling(machine, calls):
+    assert run(machine, calls, 'handshake', 'ready') == [
+        'exit_handshake', 'enter_open']
+
+
+def test_inherited(machine, calls):
+    assert run(machine, calls, 'handshake', 'ping') == ['pong']
+    assert run(machine, calls, 'open', 'ping') == ['pong_open']
+    assert run(machine, calls, 'handshake', 'drop') == [
+        'exit_handshake', 'exit_connected']
+    assert machine.state == 'idle'
+
+
+def test_self(machine, calls):
+    assert run(machine, calls, 'open', 'again') == ['enter_open']
+
+
+def test_default(machine, calls):
+    assert run(machine, calls, 'open', 'reset') == ['exit_connected']
+    assert run(machine, calls, 'handshake', 'reset') == [
+        'exit_handshake', 'exit_connected']
+
+
+def test_stream():
+    one = Parser.parse(DESCRIPTION)
+    two = Parser.parse_stream(DESCRIPTION)
+    for name, state in one.states.items():
+        for event in state.events.values():
+            other = two.states[name].events[event.name]
+            assert event.actions == other.actions
+
+
+def test_undefined_parent():
+    with pytest.raises(actions.UndefinedParent):
+        Parser.parse(['STATE a', '  PARENT b'])
+
+
+def test_circular_parent():
+    with pytest.raises(actions.CircularParent):
+        Parser.parse(['STATE a', '  PARENT b', 'STATE b', '  PARENT a'])
+
+
+def test_duplicate_parent():
+    with pytest.raises(actions.DuplicateDirective):
+        Parser.parse(['STATE a', '  PARENT b', '  PARENT c', 'STATE b'])
@@ -96,3 +96,83 @@ def test_comment():
     ])
     assert p
     assert p.first_state == 'one'
+
+
+def test_lazy():
+    description = [
+        'STATE one',
+        '  EVENT go',
+        '    ACTION go',
+        'HANDLER go tests.test_parser_lazy_missing.go',
+    ]
+    with pytest.raises(actions.ImportFailed):
+        parser.Parser.parse(description)
+    p = parser.Parser.parse(description, lazy=True)
+    with pytest.raises(actions.ImportFailed) as error:
+        p.bind()
+    assert 'line=4' in str(error.value)
+    fsm = p.build(go=lambda: None)
+    assert fsm.handle('go')
+
+
+def test_lazy_build():
+    p = parser.Parser.parse([
+        'STATE one',
+        '  EVENT go',
+        '    ACTION go',
+        'HANDLER go fsm.actions.resolve',
+        'EXCEPTION fsm.actions.resolve',
+    ], lazy=True)
+    assert isinstance(p.handlers['go'], actions.Lazy)
+    fsm = p.build(**p.handlers)
+    assert fsm.states['one'].events['go'].actions == (actions.resolve,)
+    assert fsm.exception is actions.resolve
+
+
+def describe(p):
+    return (
+        p.first_state,
+        p.actions,
+        sorted(p.events),
+        {
+            name: (
+                state.enter, state.exit,
+                {
+                    e.name: (e.next_state, e.actions)
+                    for e in state.events.values()
+                },
+            )
+            for name, state in p.states.items()
+        },
+        {name: h.__name__ for name, h in p.handlers.items()},
+        p.ctx.context_path,
+        p.ctx.exception_path,
+    )
+
+
+@pytest.mark.parametrize('path', [
+    'fsm.fsm.fsm',
+    'example.light.fsm',
+    'example.default.fsm',
+    'example.exception.fsm',
+])
+def test_stream_same(path):
+    assert describe(parser.Parser.parse_stream(path)) == \
+        describe(parser.Parser.parse(path))
+
+
+@pytest.mark.parametrize('lines, error', [
+    (['FOO'], actions.TooFewTokens),
+    (['FOO bar'], parser.UnexpectedDirective),
+    (['STATE foo bar'], actions.ExtraToken),
+    (['STATE foo', 'STATE foo'], actions.DuplicateName),
+    (['STATE foo', 'ENTER bar', 'ENTER none'], actions.DuplicateDirective),
+    (['HANDLER a fsm.actions.act_state', 'STATE one'],
+     parser.UnexpectedDirective),
+])
+def test_stream_errors(lines, error):
+    with pytest.raises(error) as expected:
+        parser.Parser.parse(lines)
+    with pytest.raises(error) as actual:
+        parser.Parser.parse_stream(iter(lines))
+    assert str(actual.value) == str(expected.value)
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from fsm.reload import Reloader, StateRemoved
+import fsm.snapshot as snapshot
+from fsm.timer import TimingWheel
+
+
+ONE = '''
+STATE off
+  EVENT press on
+STATE on
+  EVENT press off
+'''
+
+TWO = '''
+STATE off
+  EVENT press on
+STATE on
+  EVENT press dim
+  EVENT kill off
+STATE dim
+  EVENT press off
+'''
+
+THREE = '''
+STATE off
+  EVENT press off
+'''
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'light.fsm'
+    path.write_text(ONE)
+    return path
+
+
+def rewrite(path, text):
+    stat = os.stat(path)
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_reload(path):
+    reloader = Reloader(str(path))
+    one = reloader.instance()
+    two = reloader.instance()
+    one.handle('press')
+    assert not reloader.check()
+
+    rewrite(path, TWO)
+    assert reloader.check()
+    assert one.state == 'on'
+    assert two.state == 'off'
+    one.handle('press')
+    assert one.state == 'dim'
+    assert reloader.instance().handle('press')
+
+
+def test_every_instance_tracked(path, tmp_path):
+    reloader = Reloader(str(path))
+    direct = reloader.template.instance()
+    direct.handle('press')
+    snap = str(tmp_path / 'snap')
+    snapshot.save(snap, [direct])
+    restored, = snapshot.restore(snap, reloader.template)
+    assert reloader.instances == 2
+
+    rewrite(path, TWO)
+    assert reloader.check()
+    for instance in (direct, restored):
+        assert instance._state is reloader.template.states['on']
+        instance.handle('press')
+        assert instance.state == 'dim'
+
+
+def test_state_removed(path):
+    reloader = Reloader(str(path))
+    fsm = reloader.instance()
+    fsm.handle('press')
+
+    rewrite(path, THREE)
+    with pytest.raises(StateRemoved):
+        reloader.check()
+    assert fsm.handle('press')  # old graph still in place
+    assert fsm.state == 'off'
+    assert reloader.check()
+
+
+def test_instances_not_kept_alive(path):
+    reloader = Reloader(str(path))
+    fsm = reloader.instance()
+    assert reloader.instances == 1
+    del fsm
+    assert reloader.instances == 0
+
+
+TIMED = '''
+STATE off
+  EVENT press on
+STATE on
+  TIMEOUT {} press
+  EVENT press off
+'''
+
+
+def test_reload_timeout(path):
+    now = [0.0]
+    wheel = TimingWheel(tick=1, size=8, clock=lambda: now[0])
+    path.write_text(TIMED.format(5))
+    reloader = Reloader(str(path))
+    reloader.template.timers = wheel
+    fsm = reloader.instance()
+    fsm.handle('press')
+    assert fsm.state == 'on'
+
+    rewrite(path, TIMED.format(2))
+    assert reloader.check()
+    assert len(wheel) == 1  # old timer cancelled, new one armed
+    now[0] = 2
+    assert wheel.advance() == 1
+    assert fsm.state == 'off'
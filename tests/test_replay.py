@@ -0,0 +1,146 @@
+import pytest
+
+from fsm.parser import Parser
+from fsm.replay import BadLog, Log, Recorder, replay
+
+
+DESCRIPTION = [
+    'STATE off',
+    '  EVENT press on',
+    'STATE on',
+    '  EVENT press off',
+]
+
+CHANGED = [
+    'STATE off',
+    '  EVENT press on',
+    'STATE on',
+    '  EVENT press on',
+]
+
+
+def machine(description=DESCRIPTION):
+    fsm = Parser.parse(description).build()
+    fsm.state = 'off'
+    return fsm
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'events.log')
+
+
+def record(path, events, fsm=None, **kwargs):
+    with Recorder(path, fsm or machine(), **kwargs) as recorder:
+        for event in events:
+            recorder.handle(event)
+
+
+def test_log(path):
+    record(path, ['press', 'bogus', 'press'], clock=iter(range(3)).__next__)
+    with Log(path) as log:
+        records = list(log)
+    assert [(r.timestamp, r.event, r.state, r.handled) for r in records] == [
+        (0, None, 'off', None),
+        (0, 'press', 'on', True),
+        (1, 'bogus', 'on', False),
+        (2, 'press', 'off', True),
+    ]
+
+
+def test_replay(path):
+    record(path, ['press'] * 100, batch=7)
+    result = replay(path, machine())
+    assert result.count == 100
+    assert result.divergence is None
+    assert result.rate > 0
+
+
+def test_divergence(path):
+    record(path, ['press'] * 5)
+    result = replay(path, machine(CHANGED))
+    assert result.count == 1
+    assert result.divergence.index == 1
+    assert result.divergence.expected == ('off', True, False)
+    assert result.divergence.actual == ('on', True, False)
+
+
+def test_append(path):
+    record(path, ['press'])
+    fsm = machine()
+    fsm.state = 'on'
+    record(path, ['press', 'press'], fsm=fsm)
+    with Log(path) as log:
+        assert [r.state for r in log] == ['off', 'on', 'on', 'off', 'on']
+    assert replay(path, machine()).count == 3
+
+
+def test_payload(path):
+    seen = []
+    fsm = Parser.parse([
+        'STATE one',
+        '  EVENT add',
+        '    ACTION add',
+    ]).build(add=seen.append)
+    with Recorder(path, fsm, payload=lambda a, k: a[0]) as recorder:
+        recorder.handle('add', 5)
+        recorder.handle('add', 7)
+    del seen[:]
+    replay(path, fsm, payload=lambda ref: ((ref,), {}))
+    assert seen == [5, 7]
+
+
+def test_raised(path):
+    description = [
+        'STATE a',
+        '  EVENT go b',
+        'STATE b',
+        '  ENTER boom',
+        '  EVENT back a',
+    ]
+
+    def boom():
+        raise ValueError('boom')
+
+    fsm = Parser.parse(description).build(boom=boom)
+    with Recorder(path, fsm) as recorder:
+        with pytest.raises(ValueError):
+            recorder.handle('go')  # raises after the state change
+        recorder.handle('back')
+    with Log(path) as log:
+        assert [(r.state, r.raised) for r in log] == [
+            ('a', False), ('b', True), ('a', False)]
+    result = replay(path, Parser.parse(description).build(boom=boom))
+    assert result.divergence is None
+    assert result.count == 2
+
+    result = replay(path, Parser.parse(description).build(boom=lambda: None))
+    assert result.divergence.expected == ('b', False, True)
+    assert result.divergence.actual == ('b', True, False)
+
+
+def test_torn(path):
+    record(path, ['press', 'press'])
+    with open(path, 'rb+') as data:
+        data.truncate(data.seek(0, 2) - 3)
+    with Log(path) as log:
+        assert len(list(log)) == 2
+
+
+def test_torn_append(path):
+    record(path, ['press', 'press'])
+    with open(path, 'rb+') as data:
+        data.truncate(data.seek(0, 2) - 3)
+    fsm = machine()
+    fsm.state = 'on'
+    record(path, ['press'], fsm=fsm)
+    with Log(path) as log:
+        assert [r.state for r in log] == ['off', 'on', 'on', 'off']
+    assert replay(path, machine()).count == 2
+
+
+def test_bad(path):
+    with open(path, 'wb') as data:
+        data.write(b'nope!!')
+    with pytest.raises(BadLog):
+        Log(path)
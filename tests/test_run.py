@@ -0,0 +1,104 @@
+import io
+import json
+
+import pytest
+
+import fsm.run as run
+
+
+def send(*args, **kwargs):
+    pass
+
+
+def fail():
+    raise ValueError('failed')
+
+
+DESCRIPTION = '''
+STATE idle
+  EVENT open connected
+STATE connected
+  EVENT send
+    ACTION send
+  EVENT fail
+    ACTION fail
+  EVENT close closed
+STATE closed
+HANDLER send tests.test_run.send
+HANDLER fail tests.test_run.fail
+'''
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'session.fsm'
+    path.write_text(DESCRIPTION)
+    return str(path)
+
+
+def execute(path, data, *args):
+    output = io.StringIO()
+    run.main([path] + list(args), io.StringIO(data), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_jsonl(path):
+    reports = execute(path, '\n'.join([
+        '{"key": "a", "event": "open"}',
+        '["b", "open"]',
+        '{"key": "a", "event": "send", "payload": {"size": 1}}',
+        '["a", "bogus"]',
+        '["b", "fail"]',
+        '["a", "close"]',
+    ]))
+    assert reports == [
+        {'key': 'a', 'event': 'bogus', 'state': 'connected',
+         'undefined': True},
+        {'key': 'b', 'event': 'fail', 'state': 'connected',
+         'error': 'failed'},
+        {'key': 'a', 'state': 'closed', 'final': True},
+        {'key': 'b', 'state': 'connected', 'final': False},
+    ]
+
+
+def test_csv(path):
+    reports = execute(path, 'a,open\na,send,1,2\na,close\n', '--format=csv',
+                      '--transitions')
+    assert reports == [
+        {'key': 'a', 'from': 'idle', 'to': 'connected'},
+        {'key': 'a', 'from': 'connected', 'to': 'closed'},
+        {'key': 'a', 'state': 'closed', 'final': True},
+    ]
+
+
+def test_bounded(path):
+    parser = run.Parser.parse(path)
+    runner = run.Runner(parser, final=['closed'])
+    records = (
+        (key, event, (), {})
+        for key in range(1000) for event in ('open', 'close')
+    )
+    for _ in runner.feed(records):
+        pass
+    assert not runner.sessions
+
+
+def test_chunks():
+    stream = io.StringIO('a\nb\nc\n')
+    assert list(run.lines(stream, 2)) == ['a\n', 'b\n', 'c\n']
+
+
+@pytest.mark.parametrize('default, final', [
+    ('', ['closed']),
+    ('DEFAULT reset', ['closed']),  # no transition, does not leave
+    ('DEFAULT reset idle', []),
+    ('DEFAULT abort closed', ['closed']),  # leads back in, not out
+])
+def test_default_final(default, final):
+    parser = run.Parser.parse([
+        'STATE idle',
+        '  EVENT open closed',
+        'STATE closed',
+        default,
+    ])
+    assert run.Runner.default_final(parser) == final
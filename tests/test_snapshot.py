@@ -0,0 +1,85 @@
+import pytest
+
+from fsm.parser import Parser
+import fsm.snapshot as snapshot
+
+
+class Session:
+    def __init__(self, name=None):
+        self.name = name
+
+
+@pytest.fixture
+def template():
+    return Parser.parse([
+        'STATE idle',
+        '  EVENT start busy',
+        'STATE busy',
+        '  EVENT stop idle',
+        '  EVENT pause paused',
+        'STATE paused',
+        'CONTEXT tests.test_snapshot.Session',
+    ]).template()
+
+
+@pytest.fixture
+def instances(template):
+    instances = [template.instance(Session(n)) for n in range(10)]
+    for instance in instances[3:]:
+        instance.handle('start')
+    instances[9].handle('pause')
+    return instances
+
+
+def test_states_only(tmp_path, template, instances):
+    path = str(tmp_path / 'snap')
+    snapshot.save(path, instances)
+    with snapshot.Snapshot(path) as snap:
+        assert len(snap) == 10
+        assert not snap.has_contexts
+        assert snap.state(0) == 'idle'
+        assert snap.state(9) == 'paused'
+        assert snap.context(0) is None
+
+    restored = snapshot.restore(path, template)
+    assert [r.state for r in restored] == [i.state for i in instances]
+    assert restored[0].context is None
+    restored[0].handle('start')
+    assert restored[0].state == 'busy'
+
+
+def test_contexts(tmp_path, template, instances):
+    path = str(tmp_path / 'snap')
+    snapshot.save(path, instances, contexts=True)
+    restored = snapshot.restore(path, template)
+    assert [r.context.name for r in restored] == list(range(10))
+    assert all(r.template is template for r in restored)
+
+
+def test_generator(tmp_path, template, instances):
+    path = str(tmp_path / 'snap')
+    snapshot.save(path, (i for i in instances), contexts=True)
+    restored = snapshot.restore(path, template)
+    assert [r.state for r in restored] == [i.state for i in instances]
+    assert [r.context.name for r in restored] == list(range(10))
+
+
+def test_empty(tmp_path, template):
+    path = str(tmp_path / 'snap')
+    snapshot.save(path, [], contexts=True)
+    assert snapshot.restore(path, template) == []
+
+
+def test_unknown_state(tmp_path, instances):
+    path = str(tmp_path / 'snap')
+    snapshot.save(path, instances)
+    template = Parser.parse(['STATE idle', 'STATE busy']).template()
+    with pytest.raises(snapshot.UnknownState):
+        snapshot.restore(path, template)
+
+
+def test_bad_file(tmp_path, template):
+    path = tmp_path / 'snap'
+    path.write_bytes(b'not a snapshot at all')
+    with pytest.raises(snapshot.BadSnapshot):
+        snapshot.restore(str(path), template)
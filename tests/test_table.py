@@ -0,0 +1,129 @@
+import pytest
+
+import fsm.actions as actions
+from fsm.parser import Parser
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def table(calls):
+    return Parser.parse([
+        'STATE off',
+        '  EVENT press on',
+        '    ACTION turn_on',
+        'STATE on',
+        '  ENTER check',
+        '  EVENT ok',
+        '  EVENT press off',
+        '    ACTION turn_off',
+        'DEFAULT reset off',
+    ]).table(
+        turn_on=lambda *a: calls.append(('on', a)),
+        turn_off=lambda: calls.append('off'),
+        check=lambda: 'ok',
+    )
+
+
+def test_interned(table):
+    assert table.state_names == ['off', 'on']
+    assert table.event_names == ['ok', 'press', 'reset']
+    assert table.state_ids['on'] == 1
+
+
+def test_default_merged(table):
+    reset = table.event_ids['reset']
+    ok = table.event_ids['ok']
+    assert table.rows[0][reset].is_default
+    assert table.rows[0][reset].next_state == 0
+    assert table.rows[0][ok] is None
+    assert not table.rows[1][ok].is_default
+
+
+def test_handle(table, calls):
+    fsm = table.instance()
+    assert fsm.state == 'off'
+    assert fsm.handle('press', 1)
+    assert calls == [('on', (1,))]
+    assert fsm.state == 'on'
+    assert fsm.handle('reset')
+    assert fsm.state == 'off'
+    assert not fsm.handle('ok')
+    assert not fsm.handle('huh')
+
+
+def test_handle_id(table, calls):
+    fsm = table.instance()
+    press = table.event_ids['press']
+    assert fsm.handle_id(press)
+    assert fsm.state_id == table.state_ids['on']
+    assert fsm.handle_id(press)
+    assert calls == [('on', ()), 'off']
+
+
+def test_trace(table):
+    trace = []
+    fsm = table.instance()
+    fsm.trace = lambda *a: trace.append(a)
+    fsm.handle('press')
+    fsm.handle('reset')
+    assert trace == [
+        ('off', 'press', False, False),
+        ('on', 'ok', False, True),
+        ('on', 'reset', True, False),
+    ]
+
+
+def test_exception():
+    table = Parser.parse([
+        'STATE a',
+        '  EVENT go',
+        '    ACTION boom',
+        '  EVENT error b',
+        'STATE b',
+    ]).table(boom=lambda: 1 / 0)
+    fsm = table.instance()
+    with pytest.raises(ZeroDivisionError):
+        fsm.handle('go')
+    fsm.exception = lambda e: 'error'
+    assert fsm.handle('go')
+    assert fsm.state == 'b'
+
+
+def test_context():
+    table = Parser.parse([
+        'STATE a',
+        '  ENTER entered',
+        '  EVENT go b',
+        '    ACTION first',
+        '    ACTION boom',
+        'STATE b',
+        '  ENTER entered',
+        '  EVENT back a',
+    ]).table(
+        first=lambda ctx, *a: ctx.append(('first', a)),
+        boom=lambda ctx: 1 / 0,
+        entered=lambda ctx: ctx.append('entered'),
+    )
+    calls = []
+    fsm = table.instance(calls)
+    fsm.exception = lambda ctx, e: ctx.append(type(e).__name__)
+    assert fsm.handle('go', 1, 2)
+    assert calls == [('first', (1, 2)), 'ZeroDivisionError']
+    assert fsm.state == 'a'
+    assert fsm.handle('back') is False
+    assert fsm.handle_id(table.event_ids['go'], 3)
+    assert calls[2:] == [('first', (3,)), 'ZeroDivisionError']
+
+
+@pytest.mark.parametrize('line, directive', [
+    ('  TIMEOUT 5 press', 'TIMEOUT'),
+    ('  DEFER press', 'DEFER'),
+])
+def test_unsupported(line, directive):
+    parser = Parser.parse(['STATE off', line, '  EVENT press'])
+    with pytest.raises(actions.Unsupported, match=directive):
+        parser.table()
@@ -0,0 +1,133 @@
+import pytest
+
+from fsm.parser import Parser
+
+
+class LightBulb:
+    def __init__(self):
+        self.is_on = False
+        self.error = False
+
+
+def turn_on(bulb):
+    bulb.is_on = True
+
+
+def turn_off(bulb):
+    bulb.is_on = False
+
+
+def turn_off_exception(bulb):
+    raise Exception('oh no')
+
+
+def on_exception_error(bulb, e):
+    return 'error'
+
+
+def set_error(bulb):
+    bulb.error = True
+
+
+@pytest.fixture
+def template():
+    return Parser.parse([
+        'STATE off',
+        '  EVENT press on',
+        '    ACTION turn_on',
+        'STATE on',
+        '  EVENT press off',
+        '    ACTION turn_off',
+        'CONTEXT tests.test_template.LightBulb',
+        'HANDLER turn_on tests.test_template.turn_on',
+        'HANDLER turn_off tests.test_template.turn_off',
+    ]).template()
+
+
+def test_toggle(template):
+    fsm = template.instance()
+    assert fsm.state == 'off'
+    assert not fsm.context.is_on
+    assert fsm.handle('press')
+    assert fsm.state == 'on'
+    assert fsm.context.is_on
+    assert fsm.handle('press')
+    assert not fsm.context.is_on
+    assert not fsm.handle('huh')
+
+
+def test_shared_graph(template):
+    one = template.instance(LightBulb())
+    two = template.instance(LightBulb())
+    one.handle('press')
+    assert one.state == 'on'
+    assert two.state == 'off'
+    assert not two.context.is_on
+    assert not hasattr(one, '__dict__')
+
+
+def test_state_setter(template):
+    fsm = template.instance()
+    fsm.state = 'on'
+    fsm.handle('press')
+    assert fsm.state == 'off'
+    with pytest.raises(KeyError):
+        fsm.state = 'foo'
+
+
+def test_frozen(template):
+    with pytest.raises(TypeError):
+        template.states['foo'] = None
+
+
+def test_hooks(template):
+    changes = []
+    undefined = []
+    template.on_state_change = lambda i, n, o: changes.append((n, o))
+    template.undefined = lambda i, s, e, n: undefined.append((s, e))
+    fsm = template.instance()
+    fsm.handle('press')
+    fsm.handle('huh')
+    assert changes == [('on', 'off')]
+    assert undefined == [('on', 'huh')]
+
+
+def test_default():
+    template = Parser.parse([
+        'STATE off',
+        '  EVENT press on',
+        '    ACTION turn_on',
+        'STATE on',
+        '  EVENT press off',
+        '    ACTION turn_off_exception',
+        'DEFAULT error',
+        '    ACTION set_error',
+        'CONTEXT tests.test_template.LightBulb',
+        'HANDLER turn_on tests.test_template.turn_on',
+        'HANDLER turn_off_exception tests.test_template.turn_off_exception',
+        'HANDLER set_error tests.test_template.set_error',
+        'EXCEPTION tests.test_template.on_exception_error',
+    ]).template()
+    fsm = template.instance()
+    fsm.handle('press')
+    assert not fsm.context.error
+    fsm.handle('press')
+    assert fsm.state == 'on'
+    assert fsm.context.error
+
+
+def test_actions_without_context():
+    calls = []
+    template = Parser.parse([
+        'STATE a',
+        '  EVENT go b',
+        '    ACTION one',
+        'STATE b',
+        '  ENTER two',
+    ]).template(
+        one=lambda *a: calls.append(('one', a)),
+        two=lambda *a: calls.append(('two', a)),
+    )
+    fsm = template.instance()
+    fsm.handle('go', 1, 2)
+    assert calls == [('one', (1, 2)), ('two', ())]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+import fsm.actions as actions
+from fsm.parser import Parser
+from fsm.timer import TimingWheel
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def wheel(clock):
+    return TimingWheel(tick=1, size=8, clock=clock)
+
+
+def test_wheel(wheel, clock):
+    fired = []
+    wheel.arm(2, fired.append, 'two')
+    wheel.arm(20, fired.append, 'twenty')  # more than one turn
+    cancelled = wheel.arm(3, fired.append, 'three')
+    assert len(wheel) == 3
+    cancelled.cancel()
+    assert not cancelled.active
+
+    clock.now = 1.5
+    assert wheel.advance() == 0
+    clock.now = 2
+    assert wheel.advance() == 1
+    assert fired == ['two']
+    clock.now = 19.9
+    assert wheel.advance() == 0
+    clock.now = 20
+    assert wheel.advance() == 1
+    assert fired == ['two', 'twenty']
+    assert len(wheel) == 0
+
+
+DESCRIPTION = [
+    'STATE idle',
+    '  EVENT connect handshake',
+    'STATE handshake',
+    '  TIMEOUT 5 expired',
+    '  EVENT ready open',
+    '  EVENT expired idle',
+    'STATE open',
+]
+
+
+def test_fsm(wheel, clock):
+    fsm = Parser.parse(DESCRIPTION).build()
+    fsm.timers = wheel
+    fsm.handle('connect')
+    assert len(wheel) == 1
+    clock.now = 5
+    wheel.advance()
+    assert fsm.state == 'idle'
+
+    fsm.handle('connect')
+    fsm.handle('ready')  # cancelled on exit
+    assert len(wheel) == 0
+    clock.now = 20
+    wheel.advance()
+    assert fsm.state == 'open'
+
+
+def test_template(wheel, clock):
+    template = Parser.parse(DESCRIPTION).template()
+    template.timers = wheel
+    instances = [template.instance() for _ in range(100)]
+    for instance in instances:
+        instance.state = 'handshake'
+    instances[0].handle('ready')
+    assert len(wheel) == 99
+    clock.now = 5
+    assert wheel.advance() == 99
+    assert instances[0].state == 'open'
+    assert all(i.state == 'idle' for i in instances[1:])
+
+
+def test_async():
+    wheel = TimingWheel(tick=0.01)
+    parser = Parser.parse(DESCRIPTION)
+    parser.states['handshake'].timeout = (0.02, 'expired')
+    fsm = parser.build_async()
+    fsm.timers = wheel
+
+    async def run():
+        task = asyncio.ensure_future(wheel.run())
+        await fsm.handle('connect')
+        assert fsm.state == 'handshake'
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run())
+    assert fsm.state == 'idle'
+
+
+def test_callback_error(wheel, clock):
+    fired = []
+
+    def boom(name):
+        raise ValueError(name)
+
+    wheel.arm(1, boom, 'first')
+    wheel.arm(1, fired.append, 'one')
+    wheel.arm(1, boom, 'second')
+    wheel.arm(1, fired.append, 'two')
+    clock.now = 1
+    with pytest.raises(ValueError, match='first'):
+        wheel.advance()
+    assert fired == ['one', 'two']
+    assert len(wheel) == 0
+
+
+def test_async_callback_error():
+    wheel = TimingWheel(tick=0.01)
+    fired = []
+    errors = []
+
+    def boom():
+        raise ValueError('boom')
+
+    async def run():
+        asyncio.get_event_loop().set_exception_handler(
+            lambda loop, context: errors.append(context['exception']))
+        task = asyncio.ensure_future(wheel.run())
+        wheel.arm(0.01, boom)
+        wheel.arm(0.01, fired.append, 'same tick')
+        wheel.arm(0.05, fired.append, 'later')
+        await asyncio.sleep(0.15)
+        task.cancel()
+
+    asyncio.run(run())
+    assert fired == ['same tick', 'later']
+    assert [str(e) for e in errors] == ['boom']
+
+
+@pytest.mark.parametrize('line, error', [
+    ('TIMEOUT 5', actions.TooFewTokens),
+    ('TIMEOUT 5 a b', actions.ExtraToken),
+    ('TIMEOUT soon a', actions.BadTimeout),
+    ('TIMEOUT -1 a', actions.BadTimeout),
+])
+def test_errors(line, error):
+    with pytest.raises(error):
+        Parser.parse(['STATE a', line])
+
+
+def test_advance_async(wheel, clock):
+    parser = Parser.parse(DESCRIPTION)
+    parser.states['handshake'].timeout = (1, 'expired')
+    fsm = parser.build_async()
+    fsm.timers = wheel
+    asyncio.run(fsm.handle('connect'))
+    clock.now = 1
+    with pytest.raises(TypeError, match='run'):
+        wheel.advance()
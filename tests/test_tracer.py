@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from fsm.parser import Parser
+from fsm.tracer import TraceRing
+
+
+def boom():
+    raise Exception('boom')
+
+
+@pytest.fixture
+def fsm():
+    return Parser.parse([
+        'STATE off',
+        '  EVENT press on',
+        'STATE on',
+        '  ENTER check',
+        '  EVENT ok',
+        '  EVENT press off',
+        '  EVENT boom',
+        '    ACTION boom',
+        'DEFAULT reset off',
+    ]).build(check=lambda: 'ok', boom=boom)
+
+
+def test_records(fsm):
+    ring = TraceRing(10)
+    ring.attach(fsm)
+    fsm.handle('press')
+    fsm.handle('reset')
+    fsm.handle('huh')
+    records = [r[1:] for r in ring.records()]
+    assert records == [
+        ('off', 'press', False, False),
+        ('on', 'ok', False, True),
+        ('on', 'reset', True, False),
+        ('off', 'huh', False, False),
+    ]
+    timestamps = [r.timestamp for r in ring.records()]
+    assert timestamps == sorted(timestamps)
+
+
+def test_wrap(fsm):
+    ring = TraceRing(3)
+    ring.attach(fsm)
+    for _ in range(3):
+        fsm.handle('press')
+    assert ring.count == 5
+    assert len(ring) == 3
+    assert [r.event for r in ring.records()] == ['press', 'press', 'ok']
+
+
+def test_write_read(fsm):
+    ring = TraceRing(3)
+    ring.attach(fsm)
+    for _ in range(3):
+        fsm.handle('press')
+    data = io.BytesIO()
+    ring.write(data)
+    data.seek(0)
+    assert TraceRing.read(data) == ring.records()
+
+
+def test_on_exception(fsm):
+    dumps = []
+    ring = TraceRing(10)
+    ring.attach(fsm, on_exception=lambda r, e: dumps.append(r.records()))
+    fsm.handle('press')
+    with pytest.raises(Exception):
+        fsm.handle('boom')
+    assert dumps[0][-1].event == 'boom'
+
+    fsm.exception = None
+    ring.attach(fsm, on_exception=lambda r, e: dumps.append(e))
+    fsm.exception = lambda e: None
+    ring.attach(fsm, on_exception=lambda r, e: dumps.append(e))
+    assert fsm.handle('boom')
+    assert str(dumps[-1]) == 'boom'
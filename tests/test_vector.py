@@ -0,0 +1,101 @@
+import pytest
+
+import fsm.actions as actions
+from fsm.parser import Parser
+
+np = pytest.importorskip('numpy')
+vector = pytest.importorskip('fsm.vector')
+
+
+@pytest.fixture
+def machine():
+    return vector.Vector(Parser.parse([
+        'STATE idle',
+        '  EVENT start busy',
+        'STATE busy',
+        '  ENTER started',
+        '  EVENT stop idle',
+        '    ACTION stopped',
+        '  EVENT done',
+        'DEFAULT reset idle',
+    ]))
+
+
+def test_matrix(machine):
+    idle, busy = machine.state_ids['idle'], machine.state_ids['busy']
+    assert machine.next[idle, machine.event_ids['start']] == busy
+    assert machine.next[idle, machine.event_ids['stop']] == -1
+    assert machine.next[busy, machine.event_ids['reset']] == idle
+    assert machine.next[busy, machine.event_ids['done']] == busy
+    assert machine.next[idle, machine.event_id('huh')] == -1
+
+
+def test_step(machine):
+    states = machine.states(5)
+    events = machine.events(['start', 'start', 'stop', None, 'huh'])
+    step = machine.step(states, events)
+    assert [machine.state_names[s] for s in states] == \
+        ['busy', 'busy', 'idle', 'idle', 'idle']
+    assert step.undefined.tolist() == [False, False, True, False, True]
+    assert len(step.callbacks) == 1
+    callback = step.callbacks[0]
+    assert callback.state == machine.state_ids['idle']
+    assert callback.event == machine.event_ids['start']
+    assert callback.indexes.tolist() == [0, 1]
+
+
+def test_apply(machine):
+    calls = []
+    actions = dict(
+        started=lambda ctx: calls.append(('started', ctx)) or 'done',
+        stopped=lambda ctx: calls.append(('stopped', ctx)),
+    )
+    states = machine.states(3)
+    step = machine.step(states, machine.events(['start', None, 'start']))
+    events = machine.apply(step, actions, contexts=['a', 'b', 'c'])
+    assert calls == [('started', 'a'), ('started', 'c')]
+    assert events.tolist() == [machine.event_ids['done'], -1,
+                               machine.event_ids['done']]
+    step = machine.step(states, events)
+    assert not step.callbacks
+    assert not step.undefined.any()
+
+
+def boom(ctx):
+    raise ValueError(ctx)
+
+
+def test_apply_exception(machine):
+    calls = []
+    actions = dict(
+        started=lambda ctx: boom(ctx) if ctx == 'a' else 'done',
+        stopped=lambda ctx: calls.append(('stopped', ctx)),
+    )
+    machine.exception = lambda ctx, e: calls.append((ctx, str(e))) or 'reset'
+    states = machine.states(2)
+    step = machine.step(states, machine.events(['start', 'start']))
+    events = machine.apply(step, actions, contexts=['a', 'b'])
+    assert calls == [('a', 'a')]
+    assert events.tolist() == [machine.event_ids['reset'],
+                               machine.event_ids['done']]
+
+
+def test_apply_no_handler(machine):
+    calls = []
+    actions = dict(
+        started=lambda: boom('first'),
+        stopped=lambda: calls.append('stopped'),
+    )
+    states = machine.states(1, 'busy')
+    states = np.concatenate([machine.states(1), states])
+    step = machine.step(states, machine.events(['start', 'stop']))
+    with pytest.raises(ValueError, match='first'):
+        machine.apply(step, actions)
+    assert calls == ['stopped']  # later group still run
+    assert [machine.state_names[s] for s in states] == ['busy', 'idle']
+
+
+def test_unsupported():
+    parser = Parser.parse(['STATE off', '  TIMEOUT 5 press', '  EVENT press'])
+    with pytest.raises(actions.Unsupported, match='TIMEOUT'):
+        vector.Vector(parser)